@@ -50,7 +50,7 @@ class LogoGenerator:
                                create_directory_if_not_exists=True)
         env_manager = VirtualEnvironmentManager(directory=self._virtual_environment_directory)
         env_manager.setup_environment()
-        env_manager.install_package("Pillow", version="11.1.0")
+        env_manager.require([VirtualEnvironmentManager.PILLOW_REQUIREMENT])
 
     def execute(self, generate_ico_files: bool) -> None:
         """Executes the Logo Generator logic.
@@ -0,0 +1,516 @@
+""" --------------------------------------------------------------------
+Imports
+-------------------------------------------------------------------- """
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGithub:
+    """A local stand-in for the parts of the GitHub API and artifact downloads that the FNA updator uses."""
+
+    RUN_ID: int = 1000
+    """int: The ID of the only successful fnalibs workflow run."""
+
+    CHUNK_SIZE: int = 64 * 1024
+    """int: The number of bytes written at a time when sending an artifact."""
+
+    ARTIFACT_PLATFORMS: list[str] = [
+        "linux-x64", "windows-x64", "macos-arm64", "linux-arm64", "windows-x86", "macos-x64", "ios", "tvos"
+    ]
+    """list[str]: The platforms the artifacts are named after, in the order they are handed out."""
+
+    def __init__(
+            self, artifact_count: int, artifact_size_kb: int, files_per_artifact: int, latency_ms: float,
+            bandwidth_mbps: float
+    ) -> None:
+        """Initializes the fake GitHub.
+
+        Args:
+            artifact_count (int): The number of artifacts the workflow run has.
+            artifact_size_kb (int): The uncompressed size in KiB of each artifact.
+            files_per_artifact (int): The number of files in each artifact.
+            latency_ms (float): The delay in milliseconds before answering each request.
+            bandwidth_mbps (float): The speed in MiB per second at which artifacts are sent (0 for unlimited).
+        """
+        self._latency = latency_ms / 1000
+        self._bandwidth = bandwidth_mbps * 1024 * 1024
+        self._artifacts = [
+            self._make_artifact(self._get_artifact_name(index), artifact_size_kb * 1024, files_per_artifact)
+            for index in range(artifact_count)
+        ]
+        self._request_count = 0
+        self._not_modified_count = 0
+        self._request_count_lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        # tests turn off honoring Range headers to stand in for servers that always send the whole artifact
+        self.honor_range_requests = True
+        self.range_headers: list[str] = []
+
+    @property
+    def url(self) -> str:
+        """str: The base URL of the fake GitHub."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def request_count(self) -> int:
+        """int: The number of requests answered so far."""
+        return self._request_count
+
+    @property
+    def not_modified_count(self) -> int:
+        """int: The number of API requests answered 304 Not Modified so far."""
+        return self._not_modified_count
+
+    @property
+    def artifacts(self) -> list[tuple[str, bytes]]:
+        """list[tuple[str, bytes]]: The name and zip file contents of each artifact, in the order of their IDs."""
+        return self._artifacts
+
+    def start(self) -> None:
+        """Starts answering requests on a background thread."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._create_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stops answering requests."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    @classmethod
+    def _get_artifact_name(cls, index: int) -> str:
+        """Gets a name for an artifact that the updator recognizes as being for a platform.
+
+        Args:
+            index (int): The index of the artifact.
+
+        Returns:
+            str: The artifact's name.
+        """
+        name = f"fnalibs-{cls.ARTIFACT_PLATFORMS[index % len(cls.ARTIFACT_PLATFORMS)]}"
+        return name if index < len(cls.ARTIFACT_PLATFORMS) else f"{name}-{index // len(cls.ARTIFACT_PLATFORMS)}"
+
+    @staticmethod
+    def _make_artifact(name: str, size: int, file_count: int) -> tuple[str, bytes]:
+        """Makes an artifact's zip file, filled with incompressible data like the real native libraries.
+
+        Args:
+            name (str): The name of the artifact.
+            size (int): The total size in bytes of the files in the artifact.
+            file_count (int): The number of files in the artifact.
+
+        Returns:
+            tuple[str, bytes]: The name of the artifact and the contents of its zip file.
+        """
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for index in range(file_count):
+                archive.writestr(f"{name}/lib{index}.so", os.urandom(size // file_count))
+        return name, buffer.getvalue()
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        """Creates the request handler class for the server.
+
+        Returns:
+            type[BaseHTTPRequestHandler]: The request handler class.
+        """
+        github = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                with github._request_count_lock:
+                    github._request_count += 1
+                time.sleep(github._latency)
+                if "/actions/workflows/" in self.path:
+                    self._send_json({
+                        "total_count": 1,
+                        "workflow_runs": [{"id": github.RUN_ID, "status": "completed", "conclusion": "success"}],
+                    })
+                elif f"/actions/runs/{github.RUN_ID}/artifacts" in self.path:
+                    self._send_json({"total_count": len(github._artifacts), "artifacts": [
+                        {
+                            "id": index + 1, "name": name, "size_in_bytes": len(data), "expired": False,
+                            "digest": f"sha256:{hashlib.sha256(data).hexdigest()}",
+                            "archive_download_url": f"{github.url}/api.x/repos/FNA-XNA/fnalibs-dailies/actions/"
+                                                    f"artifacts/{index + 1}/zip",
+                        }
+                        for index, (name, data) in enumerate(github._artifacts)
+                    ]})
+                elif match := re.search(r"/actions/artifacts/(\d+)/zip", self.path):
+                    self._send_artifact(github._artifacts[int(match.group(1)) - 1][1])
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+
+            def _send_json(self, value: dict) -> None:
+                body = json.dumps(value).encode()
+                etag = f'"{hashlib.sha256(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with github._request_count_lock:
+                        github._not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_artifact(self, data: bytes) -> None:
+                start = 0
+                if "Range" in self.headers:
+                    github.range_headers.append(self.headers["Range"])
+                match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+                if match and github.honor_range_requests:
+                    start = int(match.group(1))
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+                else:
+                    self.send_response(200)
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Length", str(len(data) - start))
+                self.end_headers()
+                for offset in range(start, len(data), github.CHUNK_SIZE):
+                    chunk = data[offset:offset + github.CHUNK_SIZE]
+                    self.wfile.write(chunk)
+                    if github._bandwidth:
+                        time.sleep(len(chunk) / github._bandwidth)
+
+        return Handler
+
+
+class FnaUpdatorBenchmark:
+    """Benchmarks the FNA updator against local stand-ins for GitHub and the FNA git repositories."""
+
+    SCENARIOS: list[str] = ["cold", "warm", "no-op", "revalidate"]
+    """list[str]: The scenarios, in the order they run. `cold` starts with an empty user cache and project, `warm`
+    installs into a new project with the cache `cold` filled, and `no-op` runs again on the project `warm` installed.
+    `revalidate` runs again as well, but with the API response cache expired, so it measures what a pre-build hook pays
+    once the cache's time-to-live has passed: resolving the run and its artifacts with conditional requests."""
+
+    EXPIRED_CACHE_SCENARIOS: list[str] = ["revalidate"]
+    """list[str]: The scenarios that run with an API cache time-to-live of 0, and must be answered with 304s."""
+
+    SUBMODULES: list[str] = ["FAudio", "SDL3-CS", "Theorafile"]
+    """list[str]: The submodules of the FNA stand-in, like the real FNA's."""
+
+    GIT_ENVIRONMENT: dict[str, str] = {
+        "GIT_AUTHOR_NAME": "benchmark", "GIT_AUTHOR_EMAIL": "benchmark@localhost",
+        "GIT_COMMITTER_NAME": "benchmark", "GIT_COMMITTER_EMAIL": "benchmark@localhost",
+        "GIT_CONFIG_COUNT": "1", "GIT_CONFIG_KEY_0": "protocol.file.allow", "GIT_CONFIG_VALUE_0": "always",
+    }
+    """dict[str, str]: The environment for git, letting submodules be cloned from local paths."""
+
+    MIN_REGRESSION_SECONDS: float = 0.05
+    """float: How much slower than the baseline a scenario must be, at least, to count as a regression."""
+
+    def __init__(self, work_directory: str, settings: argparse.Namespace) -> None:
+        """Initializes the benchmark.
+
+        Args:
+            work_directory (str): The directory to build the stand-ins and run the scenarios in.
+            settings (argparse.Namespace): The benchmark's command line arguments.
+        """
+        self._work_directory = work_directory
+        self._settings = settings
+        self._environment = {**os.environ, **self.GIT_ENVIRONMENT}
+        self._github = FakeGithub(
+            artifact_count=settings.artifacts, artifact_size_kb=settings.artifact_size_kb,
+            files_per_artifact=settings.files_per_artifact, latency_ms=settings.latency_ms,
+            bandwidth_mbps=settings.bandwidth_mbps
+        )
+
+    def run(self) -> dict:
+        """Builds the stand-ins and runs every scenario the requested number of times.
+
+        Returns:
+            dict: The results, with the median of each measurement across the repeats.
+        """
+        # Step 1: Build the stand-ins
+        print("Building the FNA git stand-ins...")
+        fna_repo = self._build_git_repos()
+        self._github.start()
+
+        # Step 2: Run the scenarios
+        samples = {scenario: [] for scenario in self.SCENARIOS}
+        try:
+            for repeat in range(self._settings.repeat):
+                print(f"Run {repeat + 1} of {self._settings.repeat}...")
+                run_directory = os.path.join(self._work_directory, f"run{repeat}")
+                cache_directory = os.path.join(run_directory, "cache")
+                for scenario in self.SCENARIOS:
+                    project = "cold" if scenario == "cold" else "warm"
+                    project_directory = os.path.join(run_directory, project, "FNA")
+                    samples[scenario].append(
+                        self._run_scenario(scenario, fna_repo, project_directory, cache_directory)
+                    )
+                    print(f"  {scenario}: {samples[scenario][-1]['wall_seconds']:.3f}s, "
+                          f"{samples[scenario][-1]['peak_rss_kb'] / 1024:.1f} MiB peak RSS, "
+                          f"{samples[scenario][-1]['requests']} requests "
+                          f"({samples[scenario][-1]['not_modified']} not modified)")
+        finally:
+            self._github.stop()
+
+        # Step 3: Summarize
+        return {
+            "environment": {
+                "python": sys.version.split()[0], "platform": sys.platform,
+                "git": subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip(),
+            },
+            "settings": {
+                "artifacts": self._settings.artifacts, "artifact_size_kb": self._settings.artifact_size_kb,
+                "files_per_artifact": self._settings.files_per_artifact, "latency_ms": self._settings.latency_ms,
+                "bandwidth_mbps": self._settings.bandwidth_mbps, "fna_commits": self._settings.fna_commits,
+                "fna_size_kb": self._settings.fna_size_kb, "repeat": self._settings.repeat,
+            },
+            "scenarios": {scenario: self._summarize(samples[scenario]) for scenario in self.SCENARIOS},
+        }
+
+    @classmethod
+    def find_regressions(cls, results: dict, baseline: dict, tolerance: float) -> list[str]:
+        """Compares results against a baseline.
+
+        Args:
+            results (dict): The results of this benchmark.
+            baseline (dict): The results of an earlier benchmark.
+            tolerance (float): How much slower or bigger than the baseline a measurement may be, as a fraction.
+
+        Returns:
+            list[str]: A description of each regression.
+        """
+        regressions = []
+        for scenario, result in results["scenarios"].items():
+            expected = baseline["scenarios"].get(scenario)
+            if expected is None:
+                continue
+            wall_limit = max(expected["wall_seconds"] * (1 + tolerance), expected["wall_seconds"]
+                             + cls.MIN_REGRESSION_SECONDS)
+            if result["wall_seconds"] > wall_limit:
+                regressions.append(f"{scenario}: took {result['wall_seconds']:.3f}s, the baseline took "
+                                   f"{expected['wall_seconds']:.3f}s")
+            if result["peak_rss_kb"] > expected["peak_rss_kb"] * (1 + tolerance):
+                regressions.append(f"{scenario}: peaked at {result['peak_rss_kb']} KiB RSS, the baseline peaked at "
+                                   f"{expected['peak_rss_kb']} KiB")
+            # the request count doesn't vary between runs, so any increase is a regression
+            if result["requests"] > expected["requests"]:
+                regressions.append(f"{scenario}: made {result['requests']} requests, the baseline made "
+                                   f"{expected['requests']}")
+        return regressions
+
+    def _git(self, *args: str) -> None:
+        """Runs git for building the stand-ins.
+
+        Args:
+            *args (str): The arguments to git.
+        """
+        subprocess.run(["git", *args], env=self._environment, check=True, capture_output=True)
+
+    def _build_git_repos(self) -> str:
+        """Builds bare stand-ins for the FNA repository and its submodules.
+
+        Returns:
+            str: The URL of the FNA stand-in.
+        """
+        remote_directory = os.path.join(self._work_directory, "remote")
+        work_directory = os.path.join(remote_directory, "work")
+        for submodule in self.SUBMODULES:
+            directory = os.path.join(work_directory, submodule)
+            self._git("init", "-q", "-b", "main", directory)
+            with open(os.path.join(directory, "README.md"), "w") as file:
+                file.write(f"{submodule}\n")
+            self._git("-C", directory, "add", ".")
+            self._git("-C", directory, "commit", "-q", "-m", "Initial commit")
+            self._git("clone", "-q", "--bare", directory, os.path.join(remote_directory, f"{submodule}.git"))
+
+        # each commit replaces the same set of files, so the history is fna_commits times the size of a checkout
+        directory = os.path.join(work_directory, "FNA")
+        self._git("init", "-q", "-b", "main", directory)
+        file_size = self._settings.fna_size_kb * 1024 // 16
+        for commit in range(self._settings.fna_commits):
+            for index in range(16):
+                with open(os.path.join(directory, f"Source{index}.cs"), "wb") as file:
+                    file.write(os.urandom(file_size))
+            self._git("-C", directory, "add", ".")
+            self._git("-C", directory, "commit", "-q", "-m", f"Commit {commit}")
+        for submodule in self.SUBMODULES:
+            url = f"file://{os.path.join(remote_directory, f'{submodule}.git')}"
+            self._git("-C", directory, "submodule", "add", "-q", url, f"lib/{submodule}")
+        self._git("-C", directory, "commit", "-q", "-m", "Add submodules")
+        fna_repo = os.path.join(remote_directory, "FNA.git")
+        self._git("clone", "-q", "--bare", directory, fna_repo)
+        return f"file://{fna_repo}"
+
+    def _run_scenario(self, scenario: str, fna_repo: str, project_directory: str, cache_directory: str) -> dict:
+        """Runs the updator once in a child process.
+
+        Args:
+            scenario (str): The name of the scenario.
+            fna_repo (str): The URL of the FNA stand-in.
+            project_directory (str): The directory to install FNA in.
+            cache_directory (str): The per-user cache directory; the per-user data directory is created next to it.
+
+        Returns:
+            dict: The wall time, peak RSS, request counts and phase timings of the run.
+        """
+        log_path = f"{project_directory}-{scenario}.log"
+        timings_path = f"{project_directory}-{scenario}.json"
+        os.makedirs(os.path.dirname(project_directory), exist_ok=True)
+        child = {
+            "directory": project_directory, "timings_path": timings_path, "fna_repo": fna_repo,
+            "fna_libs_repo_format": f"{self._github.url}/{{pre}}x/{{post}}FNA-XNA/fnalibs-dailies",
+            "api_cache_ttl_seconds": 0 if scenario in self.EXPIRED_CACHE_SCENARIOS else None,
+        }
+        environment = {
+            **self._environment, "PROJECTTOOLS_CACHE_DIR": cache_directory,
+            "PROJECTTOOLS_DATA_DIR": os.path.join(os.path.dirname(cache_directory), "data"),
+        }
+        requests_before = self._github.request_count
+        not_modified_before = self._github.not_modified_count
+        start = time.perf_counter()
+        with open(log_path, "w") as log:
+            process = subprocess.Popen(
+                [sys.executable, os.path.realpath(__file__), "--child", json.dumps(child)],
+                stdout=log, stderr=subprocess.STDOUT, env=environment
+            )
+            # wait4 reports the peak RSS of the updator and of the git processes it waited for
+            _, status, usage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode != 0:
+            with open(log_path, "r") as log:
+                print(log.read()[-4000:])
+            raise Exception(f"The {scenario} scenario failed with exit code {process.returncode}, see {log_path}")
+
+        not_modified = self._github.not_modified_count - not_modified_before
+        if scenario in self.EXPIRED_CACHE_SCENARIOS and not_modified == 0:
+            raise Exception(f"The {scenario} scenario wasn't answered with any 304s, see {log_path}")
+
+        with open(timings_path, "r") as file:
+            timings = json.load(file)
+        return {
+            "wall_seconds": wall_seconds, "peak_rss_kb": usage.ru_maxrss,
+            "requests": self._github.request_count - requests_before, "not_modified": not_modified,
+            "phases": timings["phases"],
+        }
+
+    @staticmethod
+    def _summarize(samples: list[dict]) -> dict:
+        """Takes the median of each measurement across the repeats of a scenario.
+
+        Args:
+            samples (list[dict]): The measurements of each repeat.
+
+        Returns:
+            dict: The median measurements.
+        """
+        phases = sorted({phase for sample in samples for phase in sample["phases"]})
+        return {
+            "wall_seconds": round(statistics.median(sample["wall_seconds"] for sample in samples), 6),
+            "peak_rss_kb": int(statistics.median(sample["peak_rss_kb"] for sample in samples)),
+            "requests": int(statistics.median(sample["requests"] for sample in samples)),
+            "not_modified": int(statistics.median(sample["not_modified"] for sample in samples)),
+            "phases": {
+                phase: round(statistics.median(sample["phases"].get(phase, 0.0) for sample in samples), 6)
+                for phase in phases
+            },
+        }
+
+
+def run_child(child: dict) -> None:
+    """Runs the updator against the stand-ins, in the child process of a scenario.
+
+    Args:
+        child (dict): Where to install FNA, where to write the timings, and the URLs of the stand-ins.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+    from fna_updator import FnaUpdator
+
+    FnaUpdator.FNA_REPO = child["fna_repo"]
+    FnaUpdator.FNA_LIBS_REPO_FORMAT = child["fna_libs_repo_format"]
+    api_cache_ttl_seconds = child["api_cache_ttl_seconds"]
+    updator = FnaUpdator(
+        directory=child["directory"], personal_access_token="benchmark", platforms=[FnaUpdator.ALL_PLATFORMS],
+        api_cache_ttl_seconds=FnaUpdator.DEFAULT_API_CACHE_TTL_SECONDS if api_cache_ttl_seconds is None
+        else api_cache_ttl_seconds,
+        timings_path=child["timings_path"]
+    )
+    updator.execute()
+
+
+if __name__ == "__main__":
+    # Get arguments
+    parser = argparse.ArgumentParser(
+        description="Benchmarks fna_updator.py in cold, warm, no-op and revalidate runs against local stand-ins for "
+                    "GitHub and the FNA git repositories. Needs git, and `requests` installed for the Python running "
+                    "the benchmark."
+    )
+    parser.add_argument("--output", default="fna_updator_benchmark.json", help="the file to write the results to")
+    parser.add_argument("--baseline", default="", help="the results of an earlier benchmark to check for regressions")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="how much slower or bigger than the baseline a measurement may be, as a fraction (default 0.25)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="the number of times to run each scenario")
+    parser.add_argument("--artifacts", type=int, default=8, help="the number of fnalibs artifacts")
+    parser.add_argument("--artifact-size-kb", type=int, default=4096, help="the size in KiB of each artifact")
+    parser.add_argument("--files-per-artifact", type=int, default=8, help="the number of files in each artifact")
+    parser.add_argument("--latency-ms", type=float, default=20, help="the delay before answering each request")
+    parser.add_argument(
+        "--bandwidth-mbps", type=float, default=0, help="the artifact download speed in MiB/s (0 for unlimited)"
+    )
+    parser.add_argument("--fna-commits", type=int, default=20, help="the number of commits in the FNA stand-in")
+    parser.add_argument("--fna-size-kb", type=int, default=1024, help="the size in KiB of an FNA checkout")
+    parser.add_argument("--keep", action="store_true", help="keep the stand-ins and installs after the benchmark")
+    parser.add_argument("--child", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+
+    work_directory = tempfile.mkdtemp(prefix="fna_updator_benchmark_")
+    try:
+        results = FnaUpdatorBenchmark(work_directory, args).run()
+    finally:
+        if args.keep:
+            print(f"Kept the benchmark files in {work_directory}")
+        else:
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Wrote the results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = FnaUpdatorBenchmark.find_regressions(results, json.load(file), args.tolerance)
+        if regressions:
+            print("Regressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against the baseline.")
+    sys.exit(0)
@@ -0,0 +1,42 @@
+""" --------------------------------------------------------------------
+Imports
+-------------------------------------------------------------------- """
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from benchmark_fna_updator import FakeGithub
+from fna_updator import FnaUpdator
+
+
+@pytest.fixture
+def user_directories(tmp_path, monkeypatch) -> str:
+    """Points the per-user cache and data directories at a temporary directory.
+
+    Returns:
+        str: The per-user cache directory.
+    """
+    cache_directory = str(tmp_path / "cache")
+    monkeypatch.setenv("PROJECTTOOLS_CACHE_DIR", cache_directory)
+    monkeypatch.setenv("PROJECTTOOLS_DATA_DIR", str(tmp_path / "data"))
+    return cache_directory
+
+
+@pytest.fixture
+def github() -> FakeGithub:
+    """Runs a local stand-in for GitHub with two small artifacts."""
+    fake_github = FakeGithub(
+        artifact_count=2, artifact_size_kb=256, files_per_artifact=2, latency_ms=0, bandwidth_mbps=0
+    )
+    fake_github.start()
+    yield fake_github
+    fake_github.stop()
+
+
+@pytest.fixture
+def updator(tmp_path, user_directories, github) -> FnaUpdator:
+    """Makes an updator that installs into a temporary project and talks to the GitHub stand-in."""
+    return FnaUpdator(directory=str(tmp_path / "project"), personal_access_token="test")
@@ -0,0 +1,189 @@
+""" --------------------------------------------------------------------
+Imports
+-------------------------------------------------------------------- """
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from fna_updator import ApiResponseCache, ArtifactCache, FileStore, FnaLibsArtifact, FnaUpdator, GitError
+
+
+def _get_artifact(github, index: int = 0) -> tuple[FnaLibsArtifact, bytes]:
+    """Gets an artifact of the GitHub stand-in and the contents of its zip file."""
+    name, data = github.artifacts[index]
+    artifact = FnaLibsArtifact(
+        id=index + 1, name=name, download_url=f"{github.url}/api.x/repos/FNA-XNA/fnalibs-dailies/actions/artifacts/"
+                                              f"{index + 1}/zip",
+        size_in_bytes=len(data), digest=hashlib.sha256(data).hexdigest()
+    )
+    return artifact, data
+
+
+def _write_partial_download(part_path: str, url: str, data: bytes, bytes_done: int) -> None:
+    """Writes a partial download of the first bytes of an artifact, and its journal, as an interrupted run would."""
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    with open(part_path, "wb") as file:
+        file.write(data[:bytes_done])
+    with open(f"{part_path}.json", "w") as file:
+        json.dump({
+            "url": url, "expected_size": len(data), "bytes_done": bytes_done,
+            "sha256": hashlib.sha256(data[:bytes_done]).hexdigest(),
+        }, file)
+
+
+def test_fetch_artifact_resumes_partial_download(updator, github):
+    artifact, data = _get_artifact(github)
+    download_path = os.path.join(updator._artifact_cache.partial_directory, f"1000-{artifact.id}.zip")
+    _write_partial_download(f"{download_path}.part", artifact.download_url, data, 100000)
+
+    path = updator._fetch_artifact("1000", artifact, "")
+
+    assert github.range_headers == ["bytes=100000-"]
+    with open(path, "rb") as file:
+        assert hashlib.sha256(file.read()).hexdigest() == artifact.digest
+    assert not os.path.exists(f"{download_path}.part")
+    assert not os.path.exists(f"{download_path}.part.json")
+
+
+def test_download_discards_partial_download_past_last_checkpoint(updator, github, tmp_path):
+    artifact, data = _get_artifact(github)
+    artifact_path = str(tmp_path / "artifact.zip")
+    _write_partial_download(f"{artifact_path}.part", artifact.download_url, data, 100000)
+    with open(f"{artifact_path}.part", "ab") as file:
+        file.write(b"written after the last checkpoint")
+
+    digest = updator._download_artifact_part(artifact.name, artifact.download_url, artifact_path)
+
+    assert github.range_headers == ["bytes=100000-"]
+    assert digest == artifact.digest
+
+
+def test_download_restarts_when_journal_is_corrupt(updator, github, tmp_path):
+    artifact, data = _get_artifact(github)
+    artifact_path = str(tmp_path / "artifact.zip")
+    _write_partial_download(f"{artifact_path}.part", artifact.download_url, data, 100000)
+    with open(f"{artifact_path}.part.json", "w") as file:
+        file.write('{"url": "')
+
+    digest = updator._download_artifact_part(artifact.name, artifact.download_url, artifact_path)
+
+    assert github.range_headers == []
+    assert digest == artifact.digest
+
+
+def test_download_restarts_when_partial_download_doesnt_match_journal(updator, github, tmp_path):
+    artifact, data = _get_artifact(github)
+    artifact_path = str(tmp_path / "artifact.zip")
+    _write_partial_download(f"{artifact_path}.part", artifact.download_url, data, 100000)
+    with open(f"{artifact_path}.part", "r+b") as file:
+        file.write(b"corrupt")
+
+    digest = updator._download_artifact_part(artifact.name, artifact.download_url, artifact_path)
+
+    assert github.range_headers == []
+    assert digest == artifact.digest
+
+
+def test_download_restarts_when_server_ignores_range(updator, github, tmp_path):
+    artifact, data = _get_artifact(github)
+    artifact_path = str(tmp_path / "artifact.zip")
+    _write_partial_download(f"{artifact_path}.part", artifact.download_url, data, 100000)
+    github.honor_range_requests = False
+
+    digest = updator._download_artifact_part(artifact.name, artifact.download_url, artifact_path)
+
+    assert github.range_headers == ["bytes=100000-"]
+    assert digest == artifact.digest
+    assert os.path.getsize(artifact_path) == len(data)
+
+
+def _put_artifacts(directory: str, worker: int, count: int) -> None:
+    """Puts distinct artifacts into an artifact cache, as one of several concurrent installs."""
+    cache = ArtifactCache(directory, 1024 * 1024 * 1024)
+    for index in range(count):
+        source_path = os.path.join(cache.partial_directory, f"{worker}-{index}.zip")
+        with open(source_path, "wb") as file:
+            file.write(f"{worker}-{index}".encode())
+        cache.put(f"{worker}-{index}", source_path, hashlib.sha256(f"{worker}-{index}".encode()).hexdigest())
+
+
+def test_artifact_cache_keeps_every_put_from_concurrent_installs(tmp_path):
+    directory = str(tmp_path / "artifacts")
+    ArtifactCache(directory, 0)
+    processes = [
+        multiprocessing.Process(target=_put_artifacts, args=(directory, worker, 20)) for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+    with open(os.path.join(directory, "index.json"), "r") as file:
+        index = json.load(file)
+    assert len(index["entries"]) == len([name for name in os.listdir(directory) if name.endswith(".zip")]) == 80
+
+
+def test_artifact_cache_doesnt_evict_recently_used_artifacts(tmp_path):
+    directory = str(tmp_path / "artifacts")
+    _put_artifacts(directory, 0, 2)
+    cache = ArtifactCache(directory, 0)
+    source_path = os.path.join(cache.partial_directory, "new.zip")
+    with open(source_path, "wb") as file:
+        file.write(b"new")
+
+    cache.put("new", source_path, hashlib.sha256(b"new").hexdigest())
+
+    assert len([name for name in os.listdir(directory) if name.endswith(".zip")]) == 3
+
+
+def test_clone_failure_reports_git_error(updator, tmp_path):
+    directory = str(tmp_path / "project" / "FNA")
+
+    with pytest.raises(GitError, match="does-not-exist"):
+        updator._clone_or_update_repo(f"file://{tmp_path}/does-not-exist/FNA.git", directory, [])
+
+
+def test_api_response_cache_keeps_responses_of_concurrent_installs(tmp_path):
+    path = str(tmp_path / "github_api_cache.json")
+    first_install = ApiResponseCache(path, 300)
+    second_install = ApiResponseCache(path, 300)
+
+    first_install.store("https://api/runs", {"ETag": '"runs"'}, {"runs": 1})
+    second_install.store("https://api/artifacts", {"ETag": '"artifacts"'}, {"artifacts": 2})
+    first_install.revalidate("https://api/runs")
+
+    next_install = ApiResponseCache(path, 300)
+    assert next_install.get_fresh("https://api/runs") == {"runs": 1}
+    assert next_install.get_fresh("https://api/artifacts") == {"artifacts": 2}
+    assert next_install.get_validators("https://api/artifacts") == {"If-None-Match": '"artifacts"'}
+
+
+def test_missing_git_fails_before_installing_gitpython(tmp_path, user_directories, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    monkeypatch.delenv("GIT_PYTHON_GIT_EXECUTABLE", raising=False)
+
+    with pytest.raises(Exception, match="git not found"):
+        FnaUpdator(directory=str(tmp_path / "project"), personal_access_token="test")
+    assert not os.path.exists(tmp_path / "project")
+
+
+def test_file_store_prunes_only_old_unlinked_files_and_reports_them_missing(tmp_path):
+    store = FileStore(str(tmp_path / "store"))
+    target_path = str(tmp_path / "project" / "lib.so")
+    digest, _ = store.add(io.BytesIO(b"native library"), 1024, target_path)
+    files = {"lib.so": {"size": 14, "sha256": digest}}
+
+    assert store.prune(0) == 0
+    os.remove(target_path)
+    assert store.prune(1) == 0
+    object_path = os.path.join(str(tmp_path / "store"), "objects", digest[:2], digest)
+    os.utime(object_path, (0, 0))
+    assert store.prune(1) == 1
+
+    assert not store.link_files(files, str(tmp_path / "other_project"))
+    assert not os.path.exists(tmp_path / "other_project" / "lib.so")
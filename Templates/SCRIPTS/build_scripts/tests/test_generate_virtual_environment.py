@@ -0,0 +1,84 @@
+""" --------------------------------------------------------------------
+Imports
+-------------------------------------------------------------------- """
+import os
+
+import pytest
+
+import generate_virtual_environment
+from generate_virtual_environment import VirtualEnvironmentManager
+
+
+@pytest.fixture
+def pip_calls(monkeypatch) -> list[list[str]]:
+    """Records the pip commands run, without running them, as if every one succeeded."""
+    calls = []
+    monkeypatch.setattr(generate_virtual_environment.subprocess, "call", lambda command: calls.append(command) or 0)
+    return calls
+
+
+def _make_manager(tmp_path, user_directories, offline: bool = False, wheels: list[str] = ()) -> \
+        VirtualEnvironmentManager:
+    """Makes a manager whose wheelhouse holds empty files with the given wheel file names."""
+    manager = VirtualEnvironmentManager(str(tmp_path / "project"), offline=offline)
+    wheelhouse_directory = os.path.join(user_directories, "wheelhouse")
+    os.makedirs(wheelhouse_directory, exist_ok=True)
+    for wheel in wheels:
+        open(os.path.join(wheelhouse_directory, wheel), "w").close()
+    return manager
+
+
+def test_require_installs_missing_packages_with_one_pip_run(tmp_path, user_directories, pip_calls):
+    manager = _make_manager(tmp_path, user_directories, wheels=["six-1.16.0-py2.py3-none-any.whl"])
+
+    manager.require(["six==1.16.0", "not-installed-package>=2"])
+
+    assert len(pip_calls) == 1
+    assert "--no-index" not in pip_calls[0]
+    assert pip_calls[0][-2:] == ["six==1.16.0", "not-installed-package>=2"]
+
+
+def test_require_installs_from_wheelhouse_only_when_it_has_every_package(tmp_path, user_directories, pip_calls):
+    manager = _make_manager(tmp_path, user_directories, wheels=[
+        "Not_Installed.Package-2.1-py3-none-any.whl", "not_installed_package-1.0-py3-none-any.whl"
+    ])
+
+    manager.require(["not-installed-package>=2"])
+
+    assert len(pip_calls) == 1
+    assert "--no-index" in pip_calls[0]
+
+
+def test_require_fails_offline_without_running_pip(tmp_path, user_directories, pip_calls):
+    manager = _make_manager(tmp_path, user_directories, offline=True, wheels=[
+        "not_installed_package-1.0-py3-none-any.whl"
+    ])
+
+    with pytest.raises(Exception, match="can't be installed offline"):
+        manager.require(["not-installed-package>=2"])
+    assert pip_calls == []
+
+
+@pytest.mark.parametrize("version, specifier, satisfied", [
+    ("2.32.3", ">=2.31,<3", True),
+    ("11.1.0", "==11.1", True),
+    ("2.0.0rc1", ">=2.0", False),
+    ("2.0.0.dev3", ">=2.0", False),
+    ("2.0.0.dev3", ">=2.0.0a1", False),
+    ("2.0.0rc1", ">=2.0.0b2", True),
+    ("2.0.post1", ">2.0", True),
+    ("3.0.0rc1", "<3", False),
+    ("3.0.0rc1", "<3.0.0rc2", True),
+    ("1.4.2", "~=1.4.0", True),
+    ("1.5", "~=1.4.0", False),
+    ("1.4.2+local", "==1.4.*", True),
+    ("1.4.2", "!=1.4.*", False),
+    ("1.4.2", "=>1.4", False),
+    ("not a version", ">=1", False),
+])
+def test_is_version_satisfied(version, specifier, satisfied):
+    assert VirtualEnvironmentManager._is_version_satisfied(version, specifier) == satisfied
+
+
+def test_parse_requirement_skips_extras():
+    assert VirtualEnvironmentManager._parse_requirement("requests[socks, security] >= 2") == ("requests", ">=2")
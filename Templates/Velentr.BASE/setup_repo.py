@@ -22,9 +22,9 @@ if os.path.exists(".gitpersonalaccesstoken") and os.path.isfile(".gitpersonalacc
 else:
     raise Exception("Please execute `update_or_install_fna.py`!")
 
-# Step 5: Call fna_updator.py with the install path we want
+# Step 5: Call fna_updator.py with the install path we want (any extra arguments are passed through, e.g. --concurrency)
 fna_updator_path = os.path.join(current_file_directory, ".build", "fna_updator.py")
-command = ["python", fna_updator_path, fna_install_path, token]
+command = ["python", fna_updator_path, fna_install_path, token, *sys.argv[1:]]
 
 if sys.platform == "win32":
     p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, shell=True)
@@ -20,9 +20,9 @@ current_file_directory = os.path.dirname(os.path.realpath(__file__))
 # Step 3: Set our install path
 fna_install_path = os.path.join(os.path.dirname(current_file_directory), ".fna")
 
-# Step 4: Call fna_updator.py with the install path we want
+# Step 4: Call fna_updator.py with the install path we want (any extra arguments are passed through, e.g. --concurrency)
 fna_updator_path = os.path.join(current_file_directory, ".build", "fna_updator.py")
-command = ["python", fna_updator_path, fna_install_path, token]
+command = ["python", fna_updator_path, fna_install_path, token, *sys.argv[1:]]
 
 if sys.platform == "win32":
     p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, shell=True)
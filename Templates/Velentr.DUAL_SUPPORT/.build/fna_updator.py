@@ -1,350 +1,3168 @@
 """ --------------------------------------------------------------------
 Imports
 -------------------------------------------------------------------- """
+import argparse
+import hashlib
+import io
+import json
+import mmap
 import os
+import platform
+import random
+import re
 import shutil
+import subprocess
 import sys
+import tempfile
+import threading
+import time
 import zipfile
 
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, ClassVar, Iterator
 from datetime import datetime, timedelta
 from functools import cached_property
+from urllib.parse import urlencode, urlsplit, urlunsplit
 from generate_virtual_environment import VirtualEnvironmentManager
 
 
+@dataclass(frozen=True)
+class FnaLibsArtifact:
+    """An artifact produced by a run of the fnalibs workflow."""
+
+    id: int
+    """int: The unique identifier of the artifact."""
+
+    name: str
+    """str: The name of the artifact."""
+
+    download_url: str
+    """str: The URL the artifact's zip file is downloaded from."""
+
+    size_in_bytes: int
+    """int: The size of the artifact's zip file in bytes."""
+
+    digest: str
+    """str: The SHA-256 hex digest of the artifact's zip file as reported by GitHub, or an empty string if unknown."""
+
+    PLATFORM_ALIASES: ClassVar[dict[str, tuple[str, ...]]] = {
+        "windows": ("windows", "win", "win32", "win64", "msvc", "mingw"),
+        "linux": ("linux",),
+        "macos": ("macos", "osx", "darwin", "mac", "apple"),
+        "ios": ("ios",),
+        "tvos": ("tvos",),
+    }
+    """dict[str, tuple[str, ...]]: The words in an artifact name that identify each platform."""
+
+    ARCHITECTURE_ALIASES: ClassVar[dict[str, tuple[str, ...]]] = {
+        "x64": ("x64", "x86_64", "amd64"),
+        "x86": ("x86", "i386", "i686"),
+        "arm64": ("arm64", "aarch64"),
+    }
+    """dict[str, tuple[str, ...]]: The words in an artifact name (or machine type) that identify each architecture."""
+
+    @property
+    def platform(self) -> str | None:
+        """str | None: The platform the artifact is for, or None if it isn't platform specific."""
+        return self._match_alias(self.PLATFORM_ALIASES)
+
+    @property
+    def architecture(self) -> str | None:
+        """str | None: The architecture the artifact is for, or None if it isn't architecture specific."""
+        return self._match_alias(self.ARCHITECTURE_ALIASES)
+
+    def _match_alias(self, aliases: dict[str, tuple[str, ...]]) -> str | None:
+        """Finds the first key whose aliases appear as a word in the artifact's name.
+
+        Args:
+            aliases (dict[str, tuple[str, ...]]): The aliases to look for, keyed by what they identify.
+
+        Returns:
+            str | None: The matching key, or None if no alias appears in the name.
+        """
+        words = set(re.split(r"[^a-z0-9_]+", self.name.lower()))
+        words.update(part for word in list(words) for part in word.split("_"))
+        for key, key_aliases in aliases.items():
+            if words.intersection(key_aliases):
+                return key
+        return None
+
+
+class MemoryMappedFile(io.RawIOBase):
+    """A read-only, seekable file object over a memory map, for APIs (like zipfile) that need a real file object."""
+
+    def __init__(self, path: str) -> None:
+        """Initializes the MemoryMappedFile.
+
+        Args:
+            path (str): The path to the file to map.
+        """
+        super().__init__()
+        with open(path, "rb") as file:
+            self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def readable(self) -> bool:
+        """Returns True, the memory map can always be read."""
+        return True
+
+    def seekable(self) -> bool:
+        """Returns True, the memory map can always be seeked."""
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Reads bytes from the current position into a pre-allocated buffer.
+
+        Args:
+            buffer (bytearray | memoryview): The buffer to read into.
+
+        Returns:
+            int: The number of bytes read, 0 at the end of the file.
+        """
+        data = self._mapped.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Moves the current position.
+
+        Args:
+            offset (int): The offset to move to, relative to `whence`.
+            whence (int, optional): io.SEEK_SET, io.SEEK_CUR or io.SEEK_END. Defaults to io.SEEK_SET.
+
+        Returns:
+            int: The new absolute position.
+        """
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+
+    def tell(self) -> int:
+        """Returns the current position."""
+        return self._mapped.tell()
+
+    def close(self) -> None:
+        """Closes the memory map."""
+        if not self.closed:
+            self._mapped.close()
+        super().close()
+
+
+class InterProcessLock:
+    """An exclusive lock on a file, shared by every process that locks the same path.
+
+    The operating system releases the lock when the holder closes the file or exits, so a crashed holder never leaves
+    a stale lock behind.  The lock file itself is left in place, as removing it would let two processes lock two
+    different files at the same path.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initializes the InterProcessLock.
+
+        Args:
+            path (str): The path to the lock file.
+        """
+        self._path = path
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Acquires the lock.
+
+        Args:
+            blocking (bool, optional): Whether to wait for the lock if another process holds it. Defaults to True.
+
+        Returns:
+            bool: True if the lock was acquired, False if it is held elsewhere and `blocking` is not set.
+        """
+        file = open(self._path, "a+b")
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            file.close()
+                            return False
+                        time.sleep(0.1)
+            else:
+                import fcntl
+                try:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    file.close()
+                    return False
+        except BaseException:
+            file.close()
+            raise
+        self._file = file
+        return True
+
+    def release(self) -> None:
+        """Releases the lock."""
+        if sys.platform == "win32":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "InterProcessLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+
+class ArtifactCache:
+    """A persistent, per-user, content-addressed cache of downloaded fnalibs artifacts.
+
+    Artifact zip files are stored by their SHA-256 digest and looked up either by a key (the workflow run id plus the
+    artifact id) or by the digest GitHub reports for the artifact.  When the cache grows past its size budget the least
+    recently used artifacts are evicted.  The index is read, updated and rewritten atomically under a lock file so that
+    several installs can share the cache.
+    """
+
+    RECENT_USE_SECONDS: float = 600.0
+    """float: How long after an artifact was last used it is protected from eviction, as another install may still be
+    extracting it."""
+
+    def __init__(self, directory: str, size_budget_bytes: int) -> None:
+        """Initializes the ArtifactCache.
+
+        Args:
+            directory (str): The directory the cache is stored in.
+            size_budget_bytes (int): The maximum total size in bytes of the cached artifacts.
+        """
+        self._directory = directory
+        self._index_path = os.path.join(directory, "index.json")
+        self._size_budget_bytes = size_budget_bytes
+        self._lock = threading.Lock()
+        self._index_lock_path = f"{self._index_path}.lock"
+        self._pinned_digests: set[str] = set()
+        self.partial_directory = os.path.join(directory, "partial")
+        os.makedirs(self.partial_directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(run_id: str, artifact: FnaLibsArtifact) -> str:
+        """Makes the cache key for an artifact of a workflow run.
+
+        Args:
+            run_id (str): The ID of the workflow run the artifact belongs to.
+            artifact (FnaLibsArtifact): The artifact.
+
+        Returns:
+            str: The cache key.
+        """
+        return f"{run_id}-{artifact.id}"
+
+    def get(self, key: str, digest: str = "") -> str | None:
+        """Looks up an artifact in the cache, marking it as recently used.
+
+        Args:
+            key (str): The cache key of the artifact.
+            digest (str, optional): The expected SHA-256 hex digest of the artifact, if known. Defaults to "".
+
+        Returns:
+            str | None: The path to the cached artifact zip file, or None if the artifact isn't cached.
+        """
+        with self._lock, InterProcessLock(self._index_lock_path):
+            index = self._read_index()
+            cached_digest = index["keys"].get(key) or digest
+            if not cached_digest or cached_digest not in index["entries"] or (digest and digest != cached_digest):
+                return None
+
+            path = self._get_artifact_path(cached_digest)
+            if not os.path.isfile(path):
+                del index["entries"][cached_digest]
+                self._write_index(index)
+                return None
+
+            index["keys"][key] = cached_digest
+            index["entries"][cached_digest]["last_used"] = time.time()
+            self._pinned_digests.add(cached_digest)
+            self._write_index(index)
+            return path
+
+    def put(self, key: str, source_path: str, digest: str) -> str:
+        """Moves a downloaded artifact into the cache and evicts old artifacts if the cache is over budget.
+
+        Args:
+            key (str): The cache key of the artifact.
+            source_path (str): The path to the downloaded artifact zip file. The file is moved into the cache.
+            digest (str): The SHA-256 hex digest of the artifact zip file.
+
+        Returns:
+            str: The path to the cached artifact zip file.
+        """
+        path = self._get_artifact_path(digest)
+        with self._lock, InterProcessLock(self._index_lock_path):
+            os.replace(source_path, path)
+            index = self._read_index()
+            index["keys"][key] = digest
+            index["entries"][digest] = {"size": os.path.getsize(path), "last_used": time.time()}
+            self._pinned_digests.add(digest)
+            self._evict(index)
+            self._write_index(index)
+        return path
+
+    def _evict(self, index: dict) -> None:
+        """Evicts the least recently used artifacts until the cache is within its size budget.
+
+        Artifacts used by this process, or by any install within the last RECENT_USE_SECONDS, are never evicted.
+
+        Args:
+            index (dict): The cache index, updated in place.
+        """
+        total_size = sum(entry["size"] for entry in index["entries"].values())
+        recent_use_cutoff = time.time() - self.RECENT_USE_SECONDS
+        by_last_used = sorted(index["entries"].items(), key=lambda item: item[1]["last_used"])
+        for digest, entry in by_last_used:
+            if total_size <= self._size_budget_bytes:
+                break
+            if digest in self._pinned_digests or entry["last_used"] >= recent_use_cutoff:
+                continue
+            try:
+                FnaUpdator._remove_file_system_entry(self._get_artifact_path(digest))
+            except OSError:
+                # Probably still in use by another install, try again next time
+                continue
+            del index["entries"][digest]
+            total_size -= entry["size"]
+
+        index["keys"] = {key: digest for key, digest in index["keys"].items() if digest in index["entries"]}
+
+    def _get_artifact_path(self, digest: str) -> str:
+        """Gets the path an artifact with the given digest is stored at.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the artifact zip file.
+
+        Returns:
+            str: The path to the artifact zip file.
+        """
+        return os.path.join(self._directory, f"{digest}.zip")
+
+    def _read_index(self) -> dict:
+        """Reads the cache index, returning an empty index if it is missing or unreadable.
+
+        Returns:
+            dict: The cache index.
+        """
+        try:
+            with open(self._index_path, "r") as file:
+                index = json.load(file)
+            if isinstance(index.get("keys"), dict) and isinstance(index.get("entries"), dict):
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"keys": {}, "entries": {}}
+
+    def _write_index(self, index: dict) -> None:
+        """Atomically writes the cache index.
+
+        Args:
+            index (dict): The cache index.
+        """
+        temporary_path = f"{self._index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(index, file)
+        os.replace(temporary_path, self._index_path)
+
+
+class FileStore:
+    """A per-user, content-addressed store of individual FNA libs files shared by every project.
+
+    Each unique file is stored once, by its SHA-256 hash, and projects get hard links (or, where hard links aren't
+    possible, reflinks or copies) to it.  The files each artifact contains are recorded as well, so a project can be
+    populated from the store without opening the artifact at all.  Stored files are only linked, and only pruned, under
+    a lock file, so that one install never prunes a file another is about to link.
+    """
+
+    FICLONE: int = 0x40049409
+    """int: The Linux ioctl request that reflinks one file to another on filesystems that support it."""
+
+    def __init__(self, directory: str) -> None:
+        """Initializes the FileStore.
+
+        Args:
+            directory (str): The directory the store is kept in.
+        """
+        self._objects_directory = os.path.join(directory, "objects")
+        self._artifacts_directory = os.path.join(directory, "artifacts")
+        self._lock_path = os.path.join(directory, "store.lock")
+        self._lock = threading.Lock()
+        os.makedirs(self._objects_directory, exist_ok=True)
+        os.makedirs(self._artifacts_directory, exist_ok=True)
+
+    def get_artifact_files(self, key: str) -> dict[str, dict] | None:
+        """Gets the files of an artifact if all of them are in the store.
+
+        Args:
+            key (str): The cache key of the artifact.
+
+        Returns:
+            dict[str, dict] | None: The size and SHA-256 hash of every file in the artifact keyed by its relative path,
+                or None if the artifact (or any of its files) isn't in the store.
+        """
+        try:
+            with open(os.path.join(self._artifacts_directory, f"{key}.json"), "r") as file:
+                files = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not all(os.path.isfile(self._get_object_path(info["sha256"])) for info in files.values()):
+            return None
+        return files
+
+    def put_artifact_files(self, key: str, files: dict[str, dict]) -> None:
+        """Records the files of an artifact.
+
+        Args:
+            key (str): The cache key of the artifact.
+            files (dict[str, dict]): The size and SHA-256 hash of every file in the artifact keyed by its relative path.
+        """
+        path = os.path.join(self._artifacts_directory, f"{key}.json")
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(files, file)
+        os.replace(temporary_path, path)
+
+    def add(self, source, chunk_size: int, target_path: str) -> tuple[str, int]:
+        """Adds a file to the store, unless an identical file is already there, and places it at the target path.
+
+        Args:
+            source (BinaryIO): The file object to read the file's contents from.
+            chunk_size (int): The number of bytes to copy at a time.
+            target_path (str): The path to place the file at. Any existing file there is replaced.
+
+        Returns:
+            tuple[str, int]: The SHA-256 hex digest and size of the file.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        temporary_path = os.path.join(self._objects_directory, f"{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporary_path, "wb") as target:
+            while chunk := source.read(chunk_size):
+                target.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+
+        object_path = self._get_object_path(digest.hexdigest())
+        with self._lock, InterProcessLock(self._lock_path):
+            if os.path.isfile(object_path):
+                os.remove(temporary_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temporary_path, object_path)
+            self._link(digest.hexdigest(), target_path)
+        return digest.hexdigest(), size
+
+    def _link(self, digest: str, target_path: str) -> None:
+        """Places a stored file at the target path, hard linking, reflinking or copying it.
+
+        Must be called with the store's lock held, so the stored file isn't pruned first.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the stored file.
+            target_path (str): The path to place the file at. Any existing file there is replaced.
+        """
+        object_path = self._get_object_path(digest)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+        try:
+            os.link(object_path, target_path)
+        except OSError:
+            # Different filesystem (or one without hard links), try a copy-on-write clone before a full copy
+            if not self._reflink(object_path, target_path):
+                shutil.copyfile(object_path, target_path)
+
+    def link_files(self, files: dict[str, dict], destination: str) -> bool:
+        """Places every file of an artifact in the destination directory.
+
+        Args:
+            files (dict[str, dict]): The size and SHA-256 hash of every file keyed by its relative path.
+            destination (str): The directory to place the files in.
+
+        Returns:
+            bool: True if every file was placed, False if any of them has been pruned from the store since.
+        """
+        with self._lock, InterProcessLock(self._lock_path):
+            if not all(os.path.isfile(self._get_object_path(info["sha256"])) for info in files.values()):
+                return False
+            for relative_path, info in files.items():
+                self._link(info["sha256"], os.path.join(destination, *relative_path.split("/")))
+        return True
+
+    def prune(self, max_age_days: float) -> int:
+        """Removes stored files that no project links to any more and that were added more than the given days ago.
+
+        Args:
+            max_age_days (float): The minimum age in days of a stored file before it can be removed.
+
+        Returns:
+            int: The number of files removed.
+        """
+        removed = 0
+        cutoff = time.time() - max_age_days * 24 * 60 * 60
+        with self._lock, InterProcessLock(self._lock_path):
+            for root, _, file_names in os.walk(self._objects_directory):
+                for file_name in file_names:
+                    path = os.path.join(root, file_name)
+                    try:
+                        stat = os.stat(path)
+                        if stat.st_nlink <= 1 and stat.st_mtime < cutoff:
+                            os.remove(path)
+                            removed += 1
+                    except OSError:
+                        continue
+        return removed
+
+    def _get_object_path(self, digest: str) -> str:
+        """Gets the path a file with the given digest is stored at.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the file.
+
+        Returns:
+            str: The path to the stored file.
+        """
+        return os.path.join(self._objects_directory, digest[:2], digest)
+
+    @classmethod
+    def _reflink(cls, source: str, target: str) -> bool:
+        """Attempts to create a copy-on-write clone of a file.
+
+        Args:
+            source (str): The file to clone.
+            target (str): The path of the clone.
+
+        Returns:
+            bool: True if the clone was created, False if the platform or filesystem doesn't support it.
+        """
+        if not sys.platform.startswith("linux"):
+            return False
+
+        import fcntl
+
+        try:
+            with open(source, "rb") as source_file, open(target, "wb") as target_file:
+                fcntl.ioctl(target_file.fileno(), cls.FICLONE, source_file.fileno())
+            return True
+        except OSError:
+            FnaUpdator._remove_file_system_entry(target)
+            return False
+
+
+class ApiResponseCache:
+    """A persistent, per-user cache of GitHub API responses.
+
+    Stores the body of each successful response together with its ETag/Last-Modified validators, so that later requests
+    can be made conditional (a 304 response is served from the cache) or skipped entirely while the cached response is
+    younger than the cache's time-to-live.  Each change is merged into the cache file under a lock file, so concurrent
+    installs keep each other's responses.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float) -> None:
+        """Initializes the ApiResponseCache.
+
+        Args:
+            path (str): The path to the file the cache is stored in.
+            ttl_seconds (float): How long in seconds a cached response is used without asking the server.
+        """
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = self._read()
+
+    def get_fresh(self, url: str) -> dict | None:
+        """Gets the cached body for a URL if it is younger than the time-to-live.
+
+        Args:
+            url (str): The URL of the request.
+
+        Returns:
+            dict | None: The cached response body, or None if there isn't a fresh cached response.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None or time.time() - entry["fetched_at"] > self._ttl_seconds:
+            return None
+        return entry["body"]
+
+    def get_validators(self, url: str) -> dict[str, str]:
+        """Gets the conditional request headers for a URL.
+
+        Args:
+            url (str): The URL of the request.
+
+        Returns:
+            dict[str, str]: The If-None-Match/If-Modified-Since headers to send, empty if nothing is cached.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidate(self, url: str) -> dict:
+        """Marks the cached response for a URL as fresh after the server answered 304 Not Modified.
+
+        Args:
+            url (str): The URL of the request.
+
+        Returns:
+            dict: The cached response body.
+        """
+        with self._lock:
+            entry = self._entries[url]
+            entry["fetched_at"] = time.time()
+            self._merge(url, entry)
+            return entry["body"]
+
+    def store(self, url: str, headers, body: dict) -> None:
+        """Stores a successful response.
+
+        Args:
+            url (str): The URL of the request.
+            headers (Mapping[str, str]): The response headers.
+            body (dict): The decoded response body.
+        """
+        with self._lock:
+            self._merge(url, {
+                "etag": headers.get("ETag", ""),
+                "last_modified": headers.get("Last-Modified", ""),
+                "fetched_at": time.time(),
+                "body": body,
+            })
+
+    def _read(self) -> dict:
+        """Reads the cache file, returning no entries if it is missing or unreadable.
+
+        Returns:
+            dict: The cached entries, keyed by URL.
+        """
+        try:
+            with open(self._path, "r") as file:
+                entries = json.load(file)
+            if isinstance(entries, dict):
+                return entries
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _merge(self, url: str, entry: dict) -> None:
+        """Re-reads the cache file, sets the entry for a URL and atomically writes the cache file back.
+
+        Args:
+            url (str): The URL of the request.
+            entry (dict): The cached response.
+        """
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        with InterProcessLock(f"{self._path}.lock"):
+            self._entries = self._read()
+            self._entries[url] = entry
+            temporary_path = f"{self._path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w") as file:
+                json.dump(self._entries, file)
+            os.replace(temporary_path, self._path)
+
+
+class GitError(Exception):
+    """A git command failed."""
+
+
+@dataclass(frozen=True)
+class GitSubmodule:
+    """A submodule declared in a repository's .gitmodules file."""
+
+    name: str
+    """str: The name of the submodule."""
+
+    path: str
+    """str: The path of the submodule, relative to the repository's working tree."""
+
+    url: str
+    """str: The URL the submodule is cloned from."""
+
+
+class GitBackend(ABC):
+    """Runs git commands for the FnaUpdator."""
+
+    @abstractmethod
+    def run(self, directory: str, *args: str, check: bool = True, progress_label: str = "") -> str:
+        """Runs a git command.
+        
+        Args:
+            directory (str): The directory to run the command in.
+            *args (str): The git command and its arguments.
+            check (bool, optional): Whether to raise a GitError if the command fails. Defaults to True.
+            progress_label (str, optional): The label the command's progress is reported under, if the backend
+                reports progress; the command must be given `--progress` for git to write it. Defaults to "".
+        
+        Returns:
+            str: The command's standard output, without the trailing newline.
+        
+        Raises:
+            GitError: If the command fails and `check` is set.
+        """
+
+
+class SubprocessGitBackend(GitBackend):
+    """Runs git commands by calling the git executable directly, reporting the progress git writes to stderr."""
+
+    PROGRESS_PATTERN: re.Pattern = re.compile(r"^(?P<remote>remote: )?(?P<phase>[A-Za-z ]+):\s+(?P<percent>\d+)%")
+    """re.Pattern: Matches a progress line git writes to stderr, e.g. "Receiving objects:  45% (450/1000)"."""
+
+    PROGRESS_STEP: int = 25
+    """int: The progress of a phase is reported each time it passes another multiple of this percentage."""
+
+    STDERR_LINES_KEPT: int = 10
+    """int: The number of non-progress stderr lines of a failed command included in its error."""
+
+    def __init__(self, executable: str, progress_callback: Callable[[str, str, int], None] | None = None) -> None:
+        """Initializes the subprocess git backend.
+        
+        Args:
+            executable (str): The path to the git executable.
+            progress_callback (Callable[[str, str, int], None] | None, optional): Called with the progress label, the
+                phase and its percentage as a command makes progress. Defaults to None.
+        """
+        self._executable = executable
+        self._progress_callback = progress_callback
+
+    def run(self, directory: str, *args: str, check: bool = True, progress_label: str = "") -> str:
+        """Runs a git command.
+        
+        Args:
+            directory (str): The directory to run the command in.
+            *args (str): The git command and its arguments.
+            check (bool, optional): Whether to raise a GitError if the command fails. Defaults to True.
+            progress_label (str, optional): The label the command's progress is reported under; the command must be
+                given `--progress` for git to write it. Defaults to "" (not reported).
+        
+        Returns:
+            str: The command's standard output, without the trailing newline.
+        
+        Raises:
+            GitError: If the command fails and `check` is set.
+        """
+        process = subprocess.Popen(
+            [self._executable, *args], cwd=directory, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+        # Drain stdout on another thread so that neither pipe can fill up and stall git while stderr is parsed
+        stdout_chunks = []
+        stdout_reader = threading.Thread(target=lambda: stdout_chunks.append(process.stdout.read()), daemon=True)
+        stdout_reader.start()
+        stderr_lines = self._read_stderr(process.stderr, progress_label)
+        stdout_reader.join()
+        process.wait()
+
+        if check and process.returncode != 0:
+            details = "\n".join(stderr_lines[-self.STDERR_LINES_KEPT:])
+            raise GitError(f"git {' '.join(args)} failed with exit code {process.returncode}:\n{details}")
+        return b"".join(stdout_chunks).decode("utf-8", errors="replace").rstrip("\n")
+
+    def _read_stderr(self, stream, progress_label: str) -> list[str]:
+        """Reads a git command's stderr until it closes, reporting the progress lines and keeping the others.
+        
+        Args:
+            stream (io.BufferedReader): The command's stderr.
+            progress_label (str): The label the progress is reported under, or "" to not report it.
+        
+        Returns:
+            list[str]: The lines that aren't progress.
+        """
+        lines = []
+        reported_steps = {}
+
+        def handle_line(raw_line: bytes) -> None:
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if not line:
+                return
+            match = self.PROGRESS_PATTERN.match(line)
+            if match is None:
+                lines.append(line)
+                return
+            if match.group("remote") or not progress_label or self._progress_callback is None:
+                # The server's progress (counting and compressing objects) is of little interest to the user
+                return
+
+            # git rewrites a progress line with a carriage return many times a second, report only every step
+            phase, percent = match.group("phase").strip(), int(match.group("percent"))
+            if reported_steps.get(phase, -1) < percent // self.PROGRESS_STEP:
+                reported_steps[phase] = percent // self.PROGRESS_STEP
+                self._progress_callback(progress_label, phase, percent)
+
+        buffer = b""
+        while chunk := stream.read1(4096):
+            *complete_lines, buffer = re.split(rb"[\r\n]", buffer + chunk)
+            for raw_line in complete_lines:
+                handle_line(raw_line)
+        handle_line(buffer)
+        return lines
+
+
+class GitPythonGitBackend(GitBackend):
+    """Runs git commands through GitPython, for when git isn't on the PATH but GitPython is configured to find it."""
+
+    def run(self, directory: str, *args: str, check: bool = True, progress_label: str = "") -> str:
+        """Runs a git command.
+        
+        Args:
+            directory (str): The directory to run the command in.
+            *args (str): The git command and its arguments.
+            check (bool, optional): Whether to raise a GitError if the command fails. Defaults to True.
+            progress_label (str, optional): Unused, GitPython doesn't report progress. Defaults to "".
+        
+        Returns:
+            str: The command's standard output, without the trailing newline.
+        
+        Raises:
+            GitError: If the command fails and `check` is set.
+        """
+        from git import Git
+        from git.exc import GitCommandError
+
+        try:
+            return Git(directory).execute([Git.GIT_PYTHON_GIT_EXECUTABLE, *args], with_exceptions=check)
+        except GitCommandError as e:
+            raise GitError(str(e)) from e
+
+
 class FnaUpdator:
     """Manages and updates the FNA game development framework.
 
-    This class handles installing, updating, and setting up the environment for FNA.  It includes
-    functionality for cloning the FNA repository, installing necessary libraries, and managing
-    virtual environments.
+    This class handles installing, updating, and setting up the environment for FNA.  It includes
+    functionality for cloning the FNA repository, installing necessary libraries, and managing
+    virtual environments.
+    
+    Based on https://fna-xna.github.io/docs/1%3A-Setting-Up-FNA/#chapter-3-download-and-update-fna
+    """
+
+    FNA_REPO: str = "https://github.com/FNA-XNA/FNA"
+    """str: The URL for the FNA repository."""
+
+    FNA_LIBS_REPO_FORMAT: str = "https://{pre}github.com/{post}FNA-XNA/fnalibs-dailies"
+    """str: The URL for the FNA libs repository."""
+
+    FNA_LIBS_REPO_WORKFLOW_NAME: str = "ci.yml"
+    """str: The name of the workflow for the FNA libs repository."""
+
+    DEFAULT_RUN_LOOKBACK_DAYS: int = 7
+    """int: The default number of days to look back for a successful fnalibs workflow run."""
+
+    ALL_PLATFORMS: str = "all"
+    """str: The platform selector that installs the FNA libs for every platform."""
+
+    HOST_PLATFORM: str = "host"
+    """str: The platform selector that installs the FNA libs for the platform this script is running on."""
+
+    STORE_PRUNE_AGE_DAYS: int = 30
+    """int: The number of days an unused file is kept in the shared FNA libs file store."""
+
+    RENAME_ATTEMPTS: int = 10
+    """int: The number of times renaming a directory is attempted, as files in it may briefly be in use by a build."""
+
+    RUNS_PER_PAGE: int = 10
+    """int: The number of workflow runs requested per page when looking for the latest successful run."""
+
+    DEFAULT_DOWNLOAD_CONCURRENCY: int = 4
+    """int: The default maximum number of artifacts downloaded and extracted at the same time."""
+
+    DEFAULT_SUBMODULE_JOBS: int = 4
+    """int: The default maximum number of FNA submodules fetched and checked out at the same time."""
+
+    LOCK_FILE_NAME: str = ".fna.lock"
+    """str: The name of the lock file pinning the FNA and fnalibs versions, kept in the project directory."""
+
+    LOCK_FILE_VERSION: int = 1
+    """int: The version of the lock file format."""
+
+    LOCK_MODE_UPDATE: str = "update"
+    """str: The lock mode that installs the latest FNA and fnalibs and records them in the lock file."""
+
+    LOCK_MODE_SYNC: str = "sync"
+    """str: The lock mode that installs exactly the FNA and fnalibs versions recorded in the lock file."""
+
+    BUNDLE_FORMAT_VERSION: int = 1
+    """int: The version of the offline bundle format."""
+
+    BUNDLE_INDEX_NAME: str = "bundle.json"
+    """str: The name of the file in an offline bundle that describes its contents."""
+
+    SUBPROCESS_GIT_BACKEND: str = "subprocess"
+    """str: The git backend that calls the git executable directly."""
+
+    GITPYTHON_GIT_BACKEND: str = "gitpython"
+    """str: The git backend that goes through GitPython, installed into a virtual environment if needed."""
+
+    GITPYTHON_GIT_EXECUTABLE_ENVIRONMENT_VARIABLE: str = "GIT_PYTHON_GIT_EXECUTABLE"
+    """str: The environment variable GitPython finds git with when it isn't on the PATH."""
+
+    DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+    """int: The size in bytes of the buffer used when streaming an artifact to disk."""
+
+    SMALL_ARTIFACT_SIZE: int = 4 * 1024 * 1024
+    """int: Artifacts up to this size in bytes are read into memory in one go for extraction instead of memory-mapped."""
+
+    DOWNLOAD_JOURNAL_INTERVAL: int = 8 * 1024 * 1024
+    """int: The number of bytes downloaded between updates of a partial download's journal."""
+
+    DOWNLOAD_ATTEMPTS: int = 3
+    """int: The number of times an interrupted artifact download is resumed before giving up."""
+
+    DEFAULT_CACHE_SIZE_BUDGET_MB: int = 2048
+    """int: The default maximum size in MiB of the per-user fnalibs artifact cache."""
+
+    USER_CACHE_DIRECTORY_ENVIRONMENT_VARIABLE: str = "PROJECTTOOLS_CACHE_DIR"
+    """str: The environment variable that overrides the location of the per-user cache directory."""
+
+    USER_DATA_DIRECTORY_ENVIRONMENT_VARIABLE: str = "PROJECTTOOLS_DATA_DIR"
+    """str: The environment variable that overrides the location of the per-user data directory."""
+
+    DEFAULT_API_CACHE_TTL_SECONDS: int = 300
+    """int: The default number of seconds a cached GitHub API response is used without asking GitHub again."""
+
+    REQUEST_ATTEMPTS: int = 5
+    """int: The number of times a request is attempted before giving up on transient errors."""
+
+    REQUEST_BACKOFF_SECONDS: float = 1.0
+    """float: The delay before the first retry of a failed request; doubles with every further retry."""
+
+    REQUEST_MAX_BACKOFF_SECONDS: float = 60.0
+    """float: The longest delay between two attempts of a request."""
+
+    REQUEST_TIMEOUT_SECONDS: tuple[float, float] = (10.0, 60.0)
+    """tuple[float, float]: The connect and read timeouts for every request."""
+
+    RETRYABLE_STATUS_CODES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+    """frozenset[int]: HTTP status codes that indicate a transient failure worth retrying."""
+
+    def __init__(
+            self, directory: str, personal_access_token: str,
+            download_concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+            cache_size_budget_mb: int = DEFAULT_CACHE_SIZE_BUDGET_MB,
+            api_cache_ttl_seconds: int = DEFAULT_API_CACHE_TTL_SECONDS,
+            run_lookback_days: int = DEFAULT_RUN_LOOKBACK_DAYS,
+            run_branch: str = "",
+            run_event: str = "",
+            platforms: list[str] | None = None,
+            use_shared_store: bool = True,
+            clone_depth: int = 0,
+            clone_filter: str = "",
+            shallow_submodules: bool = False,
+            unshallow: bool = False,
+            submodule_jobs: int = DEFAULT_SUBMODULE_JOBS,
+            use_shared_mirror: bool = True,
+            git_backend: str = "",
+            lock_mode: str = "",
+            offline: bool = False,
+            timings_path: str = ""
+    ) -> None:
+        """Initializes the FNAUpdater.
+        
+        Sets up the necessary directories and installs the virtualenv package.  It also sets up the virtual environment
+        if one doesn't already exist.
+        
+        Args:
+            directory (str): The base directory for FNA installation and related files.
+            personal_access_token (str): The Github Personal Access Token with Actions (read) scope.
+            download_concurrency (int, optional): The maximum number of artifacts to download and extract at the same
+                time. Defaults to DEFAULT_DOWNLOAD_CONCURRENCY.
+            cache_size_budget_mb (int, optional): The maximum size in MiB of the per-user fnalibs artifact cache.
+                Defaults to DEFAULT_CACHE_SIZE_BUDGET_MB.
+            api_cache_ttl_seconds (int, optional): How long in seconds a cached GitHub API response is used without
+                asking GitHub again. Defaults to DEFAULT_API_CACHE_TTL_SECONDS.
+            run_lookback_days (int, optional): The number of days to look back for a successful fnalibs workflow run.
+                Defaults to DEFAULT_RUN_LOOKBACK_DAYS.
+            run_branch (str, optional): Only consider fnalibs workflow runs for this branch. Defaults to "" (any).
+            run_event (str, optional): Only consider fnalibs workflow runs triggered by this event, e.g. "schedule".
+                Defaults to "" (any).
+            platforms (list[str] | None, optional): The platforms to install the FNA libs for, each either a platform
+                ("linux"), a platform and architecture ("linux-x64"), HOST_PLATFORM or ALL_PLATFORMS. Defaults to None
+                (HOST_PLATFORM).
+            use_shared_store (bool, optional): Whether to hard link the FNA libs from the per-user file store instead
+                of extracting a private copy. Defaults to True.
+            clone_depth (int, optional): The history depth of a fresh clone of the FNA repository, 0 for the full
+                history. Later pulls keep the same depth. Defaults to 0.
+            clone_filter (str, optional): The partial clone filter of a fresh clone of the FNA repository and its
+                submodules, e.g. "blob:none". Defaults to "" (no filter).
+            shallow_submodules (bool, optional): Whether the submodules are cloned and updated with a depth of 1.
+                Defaults to False.
+            unshallow (bool, optional): Whether to fetch the full history of an existing shallow clone of the FNA
+                repository and its submodules, and to stop keeping it shallow. Defaults to False.
+            submodule_jobs (int, optional): The maximum number of FNA submodules fetched and checked out at the same
+                time. Defaults to DEFAULT_SUBMODULE_JOBS.
+            use_shared_mirror (bool, optional): Whether the FNA repository and its submodules borrow their objects from
+                per-user bare mirrors, refreshed once per run, instead of keeping and fetching a full copy for every
+                project. Not used for shallow or partial clones. The mirrors live in the per-user data directory, not
+                the cache directory, as the checkouts can't be used without them; one that is deleted anyway is
+                recreated by the next update. Defaults to True.
+            git_backend (str, optional): The git backend, SUBPROCESS_GIT_BACKEND or GITPYTHON_GIT_BACKEND. Defaults to
+                "" (SUBPROCESS_GIT_BACKEND if git is on the PATH, otherwise GITPYTHON_GIT_BACKEND if
+                GIT_PYTHON_GIT_EXECUTABLE points at git).
+            lock_mode (str, optional): LOCK_MODE_UPDATE to install the latest versions and record them in the project's
+                lock file, or LOCK_MODE_SYNC to install exactly the versions it records. Defaults to "" (LOCK_MODE_SYNC
+                if the lock file exists, otherwise install the latest versions without recording them).
+            offline (bool, optional): Whether the network must not be used, e.g. to import an offline bundle. Only full
+                clones borrowing from the shared mirrors are supported, and `requests` isn't needed. Defaults to False.
+            timings_path (str, optional): The path to write the time spent in each phase of `execute` to, as JSON.
+                Defaults to "" (not written).
+        """
+        if download_concurrency < 1:
+            raise Exception(f"Download concurrency must be at least 1, got {download_concurrency}")
+        if submodule_jobs < 1:
+            raise Exception(f"Submodule jobs must be at least 1, got {submodule_jobs}")
+        # GitPython still runs git, so check it can find it before installing GitPython
+        git_executable = shutil.which("git")
+        gitpython_git_executable = git_executable
+        if os.environ.get(self.GITPYTHON_GIT_EXECUTABLE_ENVIRONMENT_VARIABLE):
+            gitpython_git_executable = shutil.which(os.environ[self.GITPYTHON_GIT_EXECUTABLE_ENVIRONMENT_VARIABLE])
+        if not git_backend:
+            git_backend = self.SUBPROCESS_GIT_BACKEND if git_executable else self.GITPYTHON_GIT_BACKEND
+        if git_backend not in (self.SUBPROCESS_GIT_BACKEND, self.GITPYTHON_GIT_BACKEND):
+            raise Exception(f"Unknown git backend {git_backend}")
+        if git_backend == self.SUBPROCESS_GIT_BACKEND and git_executable is None:
+            raise Exception("The subprocess git backend needs git on the PATH")
+        if git_backend == self.GITPYTHON_GIT_BACKEND and gitpython_git_executable is None:
+            raise Exception(f"git not found; put it on the PATH or set "
+                            f"{self.GITPYTHON_GIT_EXECUTABLE_ENVIRONMENT_VARIABLE} to the path of the git executable")
+        if lock_mode not in ("", self.LOCK_MODE_UPDATE, self.LOCK_MODE_SYNC):
+            raise Exception(f"Unknown lock mode {lock_mode}")
+        if offline and (clone_depth > 0 or clone_filter or shallow_submodules or not use_shared_mirror):
+            raise Exception("An offline install only supports full clones that borrow from the shared mirrors")
+
+        self._timings_path = timings_path
+        self._phase_timings: dict[str, float] = {}
+        self._phase_timings_lock = threading.Lock()
+        self._personal_access_token = personal_access_token
+        self._clone_depth = clone_depth
+        self._clone_filter = clone_filter
+        self._shallow_submodules = shallow_submodules
+        self._unshallow = unshallow
+        self._submodule_jobs = submodule_jobs
+        self._use_shared_mirror = use_shared_mirror
+        self._lock_mode = lock_mode
+        self._offline = offline
+        self._refreshed_mirrors: set[str] = set()
+        self._mirror_locks: dict[str, threading.Lock] = {}
+        self._mirror_locks_lock = threading.Lock()
+        self._download_concurrency = download_concurrency
+        self._api_cache_ttl_seconds = api_cache_ttl_seconds
+        self._run_lookback_days = run_lookback_days
+        self._run_branch = run_branch
+        self._run_event = run_event
+        self._artifacts_by_run: dict[str, list[FnaLibsArtifact]] = {}
+        self._platforms = self._parse_platforms(platforms or [self.HOST_PLATFORM])
+        self._print_lock = threading.Lock()
+        self._base_directory = directory
+        self._fna_repo_install_path = os.path.join(directory, "FNA")
+        self._lock_path = os.path.join(os.path.dirname(os.path.abspath(directory)), self.LOCK_FILE_NAME)
+        self._fna_libs_install_path = os.path.join(directory, "fnalibs")
+        self._fna_libs_install_cache_path = os.path.join(directory, "fnalibs_cache")
+        self._fna_libs_staging_path = os.path.join(directory, "fnalibs.staging")
+        self._fna_libs_previous_path = os.path.join(directory, "fnalibs.previous")
+        self._fna_libs_manifest_path = os.path.join(directory, "fnalibs_manifest.json")
+        self._fna_libs_staging_manifest_path = os.path.join(directory, "fnalibs_manifest.staging.json")
+        self._fna_libs_previous_manifest_path = os.path.join(directory, "fnalibs_manifest.previous.json")
+        self._last_good_run_path = os.path.join(self._get_user_cache_directory(), "fnalibs_last_good_run.json")
+        self._artifact_cache = ArtifactCache(
+            directory=os.path.join(self._get_user_cache_directory(), "fnalibs_artifacts"),
+            size_budget_bytes=cache_size_budget_mb * 1024 * 1024,
+        )
+        self._file_store = FileStore(
+            directory=os.path.join(self._get_user_cache_directory(), "fnalibs_store")
+        ) if use_shared_store else None
+        self._mirror_directory = os.path.join(self._get_user_data_directory(), "git_mirrors")
+        self._api_response_cache = ApiResponseCache(
+            path=os.path.join(self._get_user_cache_directory(), "github_api_cache.json"),
+            ttl_seconds=api_cache_ttl_seconds,
+        )
+
+        self._fna_libs_repo = self.FNA_LIBS_REPO_FORMAT.format(pre="", post="")
+        self._fna_libs_repo_api = self.FNA_LIBS_REPO_FORMAT.format(pre="api.", post="repos/")
+
+        self._manage_directory(directory=self._base_directory, delete_directory_if_exists=False,
+                               create_directory_if_not_exists=True)
+        
+        # Only set up the virtual environment if the host Python lacks a package this run needs
+        with self._time_phase("environment"):
+            required_packages = [] if offline else [VirtualEnvironmentManager.REQUESTS_REQUIREMENT]
+            if git_backend == self.GITPYTHON_GIT_BACKEND:
+                required_packages.append(VirtualEnvironmentManager.GITPYTHON_REQUIREMENT)
+            missing_packages = [
+                package for package in required_packages if not VirtualEnvironmentManager.is_package_installed(package)
+            ]
+            if missing_packages:
+                env_manager = VirtualEnvironmentManager(directory=self._base_directory, offline=offline)
+                env_manager.setup_environment()
+                env_manager.require(missing_packages)
+
+        if git_backend == self.SUBPROCESS_GIT_BACKEND:
+            self._git: GitBackend = SubprocessGitBackend(git_executable, self._print_git_progress)
+        else:
+            self._git = GitPythonGitBackend()
+
+        self._request_timings: list[tuple[str, str, int | None, int, float]] = []
+        self._request_timings_lock = threading.Lock()
+        self._session = None if offline else self._create_session()
+
+    def execute(self) -> None:
+        """Executes the FNA update or installation process.
+        
+        Based on the provided mode, either updates or installs FNA, then installs the required FNA libraries.
+        
+        Args:
+            mode (str): The mode of operation, either "update" or "install".
+        """
+        # Step 1: Install or update FNA and the FNA libs
+        with self._time_phase("install"):
+            self._install()
+
+        # Step 2: Report how the network was used, and where the time went
+        self._print_request_timings()
+        if self._timings_path:
+            self._write_timings()
+
+        # Step 3: Done!
+        print("Done!")
+        sys.exit(0)
+
+    @contextmanager
+    def _time_phase(self, phase: str) -> Iterator[None]:
+        """Times a phase of the run, adding to the phase's total if it runs more than once or on several threads.
+        
+        Args:
+            phase (str): The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._phase_timings_lock:
+                self._phase_timings[phase] = self._phase_timings.get(phase, 0.0) + time.perf_counter() - start
+
+    def _write_timings(self) -> None:
+        """Writes the time spent in each phase and on network requests to the timings file.
+        
+        Phases run by several worker threads at once (downloading and extracting artifacts) add up the time of every
+        worker, so they can exceed the wall clock time of the phase that contains them.
+        """
+        with self._request_timings_lock:
+            request_seconds = sum(timing[4] for timing in self._request_timings)
+            request_count = len(self._request_timings)
+        timings = {
+            "phases": {phase: round(seconds, 6) for phase, seconds in self._phase_timings.items()},
+            "requests": {"count": request_count, "seconds": round(request_seconds, 6)},
+        }
+        with open(f"{self._timings_path}.tmp", "w") as file:
+            json.dump(timings, file, indent=2)
+        os.replace(f"{self._timings_path}.tmp", self._timings_path)
+
+    def export_bundle(self, bundle_path: str) -> None:
+        """Installs or updates FNA and the FNA libs as `execute` does, then packs the install into an offline bundle.
+        
+        The bundle is a zip file holding a git bundle of FNA and of each of its submodules, the zip files of the fnalibs
+        artifacts for the selected platforms and a lock file pinning all of them, so that `import_bundle` can install
+        exactly the same versions without a network connection.  The lock records the SHA-256 digest of each bundled
+        artifact's zip file, even where GitHub didn't report one.
+        
+        Args:
+            bundle_path (str): The path to write the bundle to.
+        """
+        run_id, artifacts = self._install()
+        artifacts = self._select_artifacts(artifacts)
+
+        print(f"Exporting offline bundle to {bundle_path}...")
+        index = {
+            "version": self.BUNDLE_FORMAT_VERSION,
+            "lock": self._create_lock(run_id, artifacts),
+            "repositories": [],
+            "artifacts": {},
+        }
+        with tempfile.TemporaryDirectory(dir=self._artifact_cache.partial_directory) as temporary_directory, \
+                zipfile.ZipFile(f"{bundle_path}.tmp", "w", compression=zipfile.ZIP_STORED) as bundle:
+            # Step 1: FNA and all of its submodules, each as a git bundle of its checked out commit
+            repository_paths = [self._fna_repo_install_path] + [
+                os.path.join(self._fna_repo_install_path, path)
+                for path in self._get_submodule_commits(self._fna_repo_install_path, recursive=True)
+            ]
+            for repository_path in repository_paths:
+                url = self._git.run(repository_path, "remote", "get-url", "origin")
+                git_bundle_name = f"git/{os.path.basename(self._get_mirror_path(url))}.bundle"
+                git_bundle_path = os.path.join(temporary_directory, os.path.basename(git_bundle_name))
+                self._git.run(repository_path, "bundle", "create", git_bundle_path, "HEAD")
+                bundle.write(git_bundle_path, git_bundle_name)
+                index["repositories"].append({
+                    "url": url,
+                    "commit": self._git.run(repository_path, "rev-parse", "HEAD"),
+                    "branch": self._git.run(repository_path, "symbolic-ref", "--quiet", "--short", "HEAD", check=False),
+                    "bundle": git_bundle_name,
+                })
+                print(f"  Added {url}")
+
+            # Step 2: The fnalibs artifacts, downloading any that aren't cached
+            digests = {}
+            for artifact in artifacts:
+                artifact_path = self._fetch_artifact(run_id, artifact, f"  [{artifact.name}]")
+                if artifact_path is None:
+                    self._remove_file_system_entry(f"{bundle_path}.tmp")
+                    sys.exit(1)
+                digests[artifact.id] = self._hash_file(artifact_path)
+                index["artifacts"][str(artifact.id)] = f"artifacts/{artifact.id}.zip"
+                bundle.write(artifact_path, index["artifacts"][str(artifact.id)])
+                print(f"  Added {artifact.name}")
+            for locked_artifact in index["lock"]["fnalibs"]["artifacts"]:
+                locked_artifact["digest"] = digests.get(locked_artifact["id"], locked_artifact["digest"])
+
+            bundle.writestr(self.BUNDLE_INDEX_NAME, json.dumps(index, indent=2))
+        os.replace(f"{bundle_path}.tmp", bundle_path)
+
+        print(f"  Exported {len(index['repositories'])} repositories and {len(artifacts)} artifact(s)")
+        print("Done!")
+        sys.exit(0)
+
+    def import_bundle(self, bundle_path: str) -> None:
+        """Installs FNA and the FNA libs from an offline bundle made by `export_bundle`.
+        
+        The git bundles are fetched into the shared per-user mirrors and the artifacts are added to the artifact cache,
+        then the install syncs to the bundle's lock file from those alone.  Nothing is fetched from the network.
+        
+        Args:
+            bundle_path (str): The path to the bundle.
+        """
+        print(f"Importing offline bundle {bundle_path}...")
+        with zipfile.ZipFile(bundle_path) as bundle, \
+                tempfile.TemporaryDirectory(dir=self._artifact_cache.partial_directory) as temporary_directory:
+            index = json.loads(bundle.read(self.BUNDLE_INDEX_NAME))
+            if index.get("version") != self.BUNDLE_FORMAT_VERSION:
+                raise Exception(f"Unsupported offline bundle version {index.get('version')} in {bundle_path}")
+            lock = index["lock"]
+
+            # Step 1: Add the repositories to the shared mirrors
+            for repository in index["repositories"]:
+                self._import_git_bundle(
+                    repository["url"], bundle.extract(repository["bundle"], temporary_directory), repository["branch"]
+                )
+                print(f"  Imported {repository['url']} at {repository['commit'][:12]}")
+
+            # Step 2: Add the artifacts to the artifact cache, checking them against their digests
+            run_id = lock["fnalibs"]["run_id"]
+            for artifact in [FnaLibsArtifact(**artifact) for artifact in lock["fnalibs"]["artifacts"]]:
+                artifact_path = bundle.extract(index["artifacts"][str(artifact.id)], temporary_directory)
+                digest = self._hash_file(artifact_path)
+                if not artifact.digest:
+                    raise Exception(f"Artifact {artifact.name} has no digest in the bundle's lock to check it against")
+                if digest != artifact.digest:
+                    raise Exception(f"Artifact {artifact.name} has digest {digest}, expected {artifact.digest}")
+                self._artifact_cache.put(self._artifact_cache.make_key(run_id, artifact), artifact_path, digest)
+                print(f"  Imported {artifact.name}")
+
+        # Step 3: Install exactly what the bundle holds
+        self._install(lock)
+        print("Done!")
+        sys.exit(0)
+
+    @classmethod
+    def _hash_file(cls, path: str) -> str:
+        """Computes the SHA-256 digest of a file.
+        
+        Args:
+            path (str): The path to the file.
+        
+        Returns:
+            str: The SHA-256 hex digest of the file.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(cls.DOWNLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _import_git_bundle(self, url: str, git_bundle_path: str, branch: str) -> None:
+        """Fetches the commit in a git bundle into the shared mirror of a repository, creating the mirror if needed.
+        
+        The commit is kept reachable under refs/fnaupdator/imported so that refreshing the mirror never drops it.  A
+        new mirror also gets the commit as its branch, as a checkout cloned from a mirror without branches is empty.
+        
+        Args:
+            url (str): The URL of the repository.
+            git_bundle_path (str): The path to the git bundle, holding the repository's HEAD.
+            branch (str): The branch the repository had checked out when exported, or "" if its HEAD was detached.
+        """
+        mirror_path = self._get_mirror_path(url)
+        os.makedirs(self._mirror_directory, exist_ok=True)
+        with InterProcessLock(f"{mirror_path}.lock"):
+            if not os.path.isfile(os.path.join(mirror_path, "HEAD")):
+                partial_path = f"{mirror_path}.partial"
+                self._remove_file_system_entry(partial_path)
+                self._git.run(self._mirror_directory, "init", "--quiet", "--bare", partial_path)
+                self._git.run(partial_path, "config", "remote.origin.url", url)
+                self._git.run(partial_path, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+                self._git.run(partial_path, "config", "gc.pruneExpire", "never")
+                self._git.run(
+                    partial_path, "fetch", "--quiet", git_bundle_path, f"+HEAD:refs/heads/{branch or 'main'}"
+                )
+                self._git.run(partial_path, "symbolic-ref", "HEAD", f"refs/heads/{branch or 'main'}")
+                os.rename(partial_path, mirror_path)
+
+            commit = self._git.run(mirror_path, "bundle", "list-heads", git_bundle_path, "HEAD").split()[0]
+            self._git.run(
+                mirror_path, "fetch", "--quiet", git_bundle_path, f"+HEAD:refs/fnaupdator/imported/{commit}"
+            )
+        self._refreshed_mirrors.add(mirror_path)
+
+    def _install(self, lock: dict | None = None) -> tuple[str, list[FnaLibsArtifact]]:
+        """Installs or updates FNA and the FNA libs, following the lock mode unless given the lock file to install.
+        
+        Args:
+            lock (dict | None, optional): The lock file to install exactly. Defaults to None.
+        
+        Returns:
+            tuple[str, list[FnaLibsArtifact]]: The ID of the installed fnalibs workflow run and all of its artifacts.
+        """
+        # Step 1: Install the versions pinned by the lock file, if there is one, or the latest versions?
+        lock_mode = self.LOCK_MODE_SYNC
+        if lock is None:
+            lock = self._read_lock()
+            lock_mode = self._lock_mode or (self.LOCK_MODE_SYNC if lock is not None else "")
+            if lock_mode == self.LOCK_MODE_SYNC:
+                if lock is None:
+                    print(f"No lock file at {self._lock_path}")
+                    print(f"  Run with the '{self.LOCK_MODE_UPDATE}' lock mode to create it")
+                    sys.exit(1)
+                print(f"Installing the versions pinned by {self._lock_path}...")
+            else:
+                lock = None
+
+        # Step 2: Install or update the FNA repo
+        with self._time_phase("fna_repo"):
+            self._clone_or_update_repo(
+                repo=lock["fna"]["repository"] if lock else self.FNA_REPO, directory=self._fna_repo_install_path,
+                clone_multi_options=[], commit=lock["fna"]["commit"] if lock else ""
+            )
+            if lock is not None:
+                self._check_locked_submodules(lock)
+
+        # Step 3: Install the FNA libs
+        run_id, artifacts = self._install_fna_libs_manager(
+            (lock["fnalibs"]["run_id"], [FnaLibsArtifact(**artifact) for artifact in lock["fnalibs"]["artifacts"]])
+            if lock else None
+        )
+
+        # Step 4: Record what was installed?
+        if lock_mode == self.LOCK_MODE_UPDATE:
+            self._write_lock(run_id, artifacts)
+            print(f"Updated {self._lock_path}")
+        return run_id, artifacts
+
+    @cached_property
+    def _get_request_headers(self) -> dict[str, str]:
+        """Gets the request headers for the GitHub API calls."""
+        return {
+            "Accept": "application/vnd.github.v3+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+
+    def _create_session(self):
+        """Creates the pooled HTTP session shared by every network call.
+        
+        The connection pool is sized to the download concurrency so that every download worker can keep its connection
+        alive between requests.
+        
+        Returns:
+            requests.Session: The HTTP session.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {self._personal_access_token}"
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(self._download_concurrency, 4), max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, url: str, **kwargs):
+        """Makes a GET request with the shared session, retrying transient failures.
+        
+        Connection errors, timeouts, 5xx responses and rate limited responses are retried up to REQUEST_ATTEMPTS times
+        with exponential backoff.  Retry-After and X-RateLimit-Reset headers are honoured when the server sends them.
+        
+        Args:
+            url (str): The URL to request.
+            **kwargs: Additional arguments for `requests.Session.get`.
+        
+        Returns:
+            requests.Response: The response of the last attempt.
+        
+        Raises:
+            requests.RequestException: If the last attempt failed without a response.
+        """
+        import requests
+
+        kwargs.setdefault("timeout", self.REQUEST_TIMEOUT_SECONDS)
+        for attempt in range(1, self.REQUEST_ATTEMPTS + 1):
+            start_time = time.perf_counter()
+            try:
+                response = self._session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_request_timing(url, None, attempt, time.perf_counter() - start_time)
+                if attempt == self.REQUEST_ATTEMPTS:
+                    raise
+                delay = self._get_retry_delay(attempt, None)
+                self._print(f"    Request to {url} failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+
+            self._record_request_timing(url, response.status_code, attempt, time.perf_counter() - start_time)
+            if attempt == self.REQUEST_ATTEMPTS or not self._is_retryable_response(response):
+                return response
+
+            delay = self._get_retry_delay(attempt, response)
+            response.close()
+            self._print(f"    Request to {url} returned {response.status_code}, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+    def _is_retryable_response(self, response) -> bool:
+        """Checks whether a response indicates a transient failure that is worth retrying.
+        
+        Args:
+            response (requests.Response): The response to check.
+        
+        Returns:
+            bool: True if the request should be retried, False otherwise.
+        """
+        if response.status_code in self.RETRYABLE_STATUS_CODES:
+            return True
+        # GitHub answers 403 for both primary (X-RateLimit-Remaining: 0) and secondary (Retry-After) rate limits
+        return response.status_code == 403 and (
+            response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+        )
+
+    def _get_retry_delay(self, attempt: int, response) -> float:
+        """Calculates how long to wait before retrying a request.
+        
+        Args:
+            attempt (int): The attempt that just failed, starting at 1.
+            response (requests.Response | None): The response of the failed attempt, if there was one.
+        
+        Returns:
+            float: The number of seconds to wait.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.REQUEST_MAX_BACKOFF_SECONDS)
+            rate_limit_reset = response.headers.get("X-RateLimit-Reset", "")
+            if response.headers.get("X-RateLimit-Remaining") == "0" and rate_limit_reset.isdigit():
+                return min(max(float(rate_limit_reset) - time.time(), 0.0) + 1.0, self.REQUEST_MAX_BACKOFF_SECONDS)
+
+        backoff = self.REQUEST_BACKOFF_SECONDS * (2 ** (attempt - 1))
+        return min(backoff + random.uniform(0, self.REQUEST_BACKOFF_SECONDS), self.REQUEST_MAX_BACKOFF_SECONDS)
+
+    def _record_request_timing(self, url: str, status_code: int | None, attempt: int, seconds: float) -> None:
+        """Records how long a request took.
+        
+        Args:
+            url (str): The URL that was requested.
+            status_code (int | None): The status code of the response, or None if the request failed without one.
+            attempt (int): The attempt number of the request, starting at 1.
+            seconds (float): The time in seconds until the response headers arrived.
+        """
+        with self._request_timings_lock:
+            self._request_timings.append(("GET", url, status_code, attempt, seconds))
+
+    def _print_request_timings(self) -> None:
+        """Prints the timing of every request made so far."""
+        if not self._request_timings:
+            return
+
+        print(f"Network requests ({len(self._request_timings)}):")
+        for method, url, status_code, attempt, seconds in self._request_timings:
+            retry = f" (attempt {attempt})" if attempt > 1 else ""
+            print(f"  {method} {url} -> {status_code or 'error'} in {seconds:.3f}s{retry}")
+        print(f"  Total: {sum(timing[4] for timing in self._request_timings):.3f}s")
     
-    Based on https://fna-xna.github.io/docs/1%3A-Setting-Up-FNA/#chapter-3-download-and-update-fna
-    """
+    @classmethod
+    def _get_user_data_directory(cls) -> str:
+        """Gets the per-user data directory, for shared files that checkouts depend on and that may not be purged.
+        
+        Returns:
+            str: The path to the per-user data directory.
+        """
+        if os.environ.get(cls.USER_DATA_DIRECTORY_ENVIRONMENT_VARIABLE):
+            return os.environ[cls.USER_DATA_DIRECTORY_ENVIRONMENT_VARIABLE]
+        if sys.platform == "win32":
+            base_directory = os.environ.get("LOCALAPPDATA", os.path.expanduser(os.path.join("~", "AppData", "Local")))
+            return os.path.join(base_directory, "ProjectTools", "Data")
+        if sys.platform == "darwin":
+            base_directory = os.path.expanduser(os.path.join("~", "Library", "Application Support"))
+        else:
+            base_directory = os.environ.get(
+                "XDG_DATA_HOME", os.path.expanduser(os.path.join("~", ".local", "share"))
+            )
+        return os.path.join(base_directory, "ProjectTools")
 
-    FNA_REPO: str = "https://github.com/FNA-XNA/FNA"
-    """str: The URL for the FNA repository."""
+    @classmethod
+    def _get_user_cache_directory(cls) -> str:
+        """Gets the per-user cache directory shared by every project's FNA installation.
+        
+        Returns:
+            str: The path to the per-user cache directory.
+        """
+        if os.environ.get(cls.USER_CACHE_DIRECTORY_ENVIRONMENT_VARIABLE):
+            return os.environ[cls.USER_CACHE_DIRECTORY_ENVIRONMENT_VARIABLE]
+        if sys.platform == "win32":
+            base_directory = os.environ.get("LOCALAPPDATA", os.path.expanduser(os.path.join("~", "AppData", "Local")))
+        elif sys.platform == "darwin":
+            base_directory = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+        else:
+            base_directory = os.environ.get("XDG_CACHE_HOME", os.path.expanduser(os.path.join("~", ".cache")))
+        return os.path.join(base_directory, "ProjectTools")
 
-    FNA_LIBS_REPO_FORMAT: str = "https://{pre}github.com/{post}FNA-XNA/fnalibs-dailies"
-    """str: The URL for the FNA libs repository."""
+    @classmethod
+    def _parse_platforms(cls, platforms: list[str]) -> list[tuple[str, str | None]] | None:
+        """Parses the platform selectors.
+        
+        Args:
+            platforms (list[str]): The platform selectors.
+        
+        Returns:
+            list[tuple[str, str | None]] | None: The selected platforms and (optional) architectures, or None if every
+                platform is selected.
+        
+        Raises:
+            Exception: If a platform or architecture is unknown.
+        """
+        selected = []
+        for selector in platforms:
+            selector = selector.strip().lower()
+            if selector == cls.ALL_PLATFORMS:
+                return None
+            if selector == cls.HOST_PLATFORM:
+                selected.append(cls._get_host_platform())
+                continue
+
+            platform_name, _, architecture = selector.partition("-")
+            if platform_name not in FnaLibsArtifact.PLATFORM_ALIASES:
+                raise Exception(f"Unknown platform {platform_name}, expected one of: "
+                                f"{', '.join([cls.ALL_PLATFORMS, cls.HOST_PLATFORM, *FnaLibsArtifact.PLATFORM_ALIASES])}")
+            if architecture and architecture not in FnaLibsArtifact.ARCHITECTURE_ALIASES:
+                raise Exception(f"Unknown architecture {architecture}, expected one of: "
+                                f"{', '.join(FnaLibsArtifact.ARCHITECTURE_ALIASES)}")
+            selected.append((platform_name, architecture or None))
+        return selected
+
+    @staticmethod
+    def _get_host_platform() -> tuple[str, str | None]:
+        """Gets the platform and architecture this script is running on.
+        
+        Returns:
+            tuple[str, str | None]: The platform and architecture, or None for the architecture if it isn't known.
+        """
+        system = platform.system()
+        platform_name = {"Windows": "windows", "Darwin": "macos"}.get(system, "linux")
+
+        machine = platform.machine().lower()
+        architecture = None
+        for key, aliases in FnaLibsArtifact.ARCHITECTURE_ALIASES.items():
+            if machine in aliases:
+                architecture = key
+        return platform_name, architecture
+
+    def _select_artifacts(self, artifacts: list[FnaLibsArtifact]) -> list[FnaLibsArtifact]:
+        """Filters artifacts down to the ones for the selected platforms.
+        
+        Artifacts that aren't platform (or architecture) specific are always selected.
+        
+        Args:
+            artifacts (list[FnaLibsArtifact]): The artifacts of a workflow run.
+        
+        Returns:
+            list[FnaLibsArtifact]: The artifacts to install.
+        """
+        if self._platforms is None:
+            return artifacts
+
+        selected = []
+        for artifact in artifacts:
+            artifact_platform, artifact_architecture = artifact.platform, artifact.architecture
+            if artifact_platform is None or any(
+                    artifact_platform == platform_name
+                    and (architecture is None or artifact_architecture is None or artifact_architecture == architecture)
+                    for platform_name, architecture in self._platforms
+            ):
+                selected.append(artifact)
+        return selected
+
+    def _manage_directory(
+            self, *, directory: str, delete_directory_if_exists: bool, create_directory_if_not_exists: bool
+    ) -> None:
+        """Manages a directory, ensuring it exists and is a directory, not a file.
+        
+        Args:
+            directory (str): The path to the directory to manage.
+            create_directory_if_not_exists (bool): Whether to create the directory if it doesn't exist.
+        """
+        if os.path.exists(directory):
+            if os.path.isfile(directory):
+                raise Exception(f"Directory {directory} already exists and is a file?")
+
+            if delete_directory_if_exists:
+                self._remove_file_system_entry(directory)
+
+        if create_directory_if_not_exists and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def _remove_file_system_entry(path: str) -> None:
+        """Removes a file or directory from the file system.
+        
+        Deletes the specified file or directory.  If the path does not exist, no action is taken.
+                
+        Args:
+            path (str): The path to the file or directory to remove.
+        """
+        if not os.path.exists(path):
+            return
+
+        if os.path.isfile(path):
+            os.remove(path)
+        else:
+            shutil.rmtree(path)
+
+    def _clone_or_update_repo(
+            self, repo: str, directory: str, clone_multi_options: list[str], commit: str = ""
+    ) -> None:
+        """Clones or updates a Git repository with specified options.
+        
+        Handles repository management by either cloning a new repository or updating an existing one, including submodule initialization.
+        A fresh clone can be shallow and/or partial; those settings are recorded in the repository's config so that
+        later pulls and submodule updates keep to them, until an update with `unshallow` fetches the full history.
+        A full clone instead borrows its objects from the shared per-user mirror of the repository (and each
+        submodule from the mirror of that submodule), so that it only fetches from the mirror once that is refreshed.
+        An existing repository whose HEAD already matches the remote branch isn't pulled, and only the submodules
+        that don't match the commits recorded for them are updated.  Given a commit, the repository is moved to that
+        commit instead of following the remote branch, fetching it only if it isn't already available locally.
+        
+        Args:
+            repo: The URL of the Git repository to clone or update.
+            directory: The local directory path where the repository will be cloned or updated.
+            clone_multi_options: Additional options to use during repository cloning.
+            commit: The commit to check out, or "" to follow the remote branch.
+        
+        Returns:
+            None
+        
+        Raises:
+            Exception: If the specified directory is a file instead of a directory.
+            GitError: If the repository can't be cloned.
+        """
+        # Step 1: Check if we need to clone or update the repo...
+        clone = True
+        update = False
+
+        repoName = os.path.basename(repo)
+
+        if os.path.exists(directory):
+            if os.path.isfile(directory):
+                raise Exception(f"Directory {directory} already exists and is a file?")
+            if os.path.exists(os.path.join(directory, ".git")):
+                update = True
+                clone = False
+
+        # Step 2: Clone the repo?
+        if clone:
+            try:
+                print(f"Cloning {repoName}...")
+                clone_path = os.path.abspath(directory)
+                os.makedirs(os.path.dirname(clone_path), exist_ok=True)
+                if self._can_use_mirror(self._clone_depth, self._clone_filter, self._shallow_submodules):
+                    self._git.run(
+                        os.path.dirname(clone_path), "clone", "--progress", "--shared", *clone_multi_options,
+                        self._refresh_mirror(repo), clone_path, progress_label=repoName
+                    )
+                    self._git.run(directory, "remote", "set-url", "origin", repo)
+                else:
+                    self._git.run(
+                        os.path.dirname(clone_path), "clone", "--progress", *clone_multi_options,
+                        *self._get_clone_options(), repo, clone_path, progress_label=repoName
+                    )
+                self._write_clone_settings(directory, self._clone_depth, self._clone_filter, self._shallow_submodules)
+            except Exception:
+                # Only a clone that lost a race with another install's clone can be updated instead
+                if not os.path.isdir(os.path.join(directory, ".git")):
+                    raise
+                print("  Repo already exists, attempting to update...")
+                update = True
+
+        # Step 3: Update the repo?
+        depth, clone_filter, shallow_submodules = self._read_clone_settings(directory)
+        use_mirror = self._can_use_mirror(depth, clone_filter, shallow_submodules)
+        if update and use_mirror:
+            self._repair_alternates(directory, repo)
+        if update and self._unshallow:
+            print(f"  Fetching the full history of {repoName}...")
+            if os.path.exists(os.path.join(self._get_git_dir(directory), "shallow")):
+                self._git.run(directory, "fetch", "--progress", "--unshallow", progress_label=repoName)
+            self._git.run(directory, "submodule", "foreach", "--recursive", "git fetch --unshallow || true")
+            depth, shallow_submodules = 0, False
+            self._write_clone_settings(directory, depth, clone_filter, shallow_submodules)
+        if commit:
+            self._checkout_commit(directory, repo, repoName, commit, depth, use_mirror)
+            update = False
+        elif update and not self._unshallow and self._is_up_to_date(directory):
+            print(f"  {repoName} is up to date")
+            update = False
+        if update:
+            print(f"  Updating {repoName}...")
+            if depth > 0:
+                # A depth limited fetch cuts the history at the new tip, so the old HEAD is no longer its ancestor
+                # and a pull would see divergent branches; move the branch to the fetched tip instead, keeping any
+                # local changes that don't conflict.  Submodules are fetched by the submodule update below
+                self._git.run(
+                    directory, "fetch", "--progress", "--no-recurse-submodules", f"--depth={depth}",
+                    progress_label=repoName
+                )
+                self._git.run(directory, "reset", "--keep", "@{upstream}")
+            elif use_mirror:
+                mirror_path = self._refresh_mirror(repo)
+                self._add_alternate(self._get_git_dir(directory), mirror_path)
+                self._git.run(
+                    directory, "fetch", "--no-recurse-submodules", mirror_path, "+refs/heads/*:refs/remotes/origin/*"
+                )
+                self._git.run(directory, "merge", "--ff-only", "@{upstream}")
+            else:
+                self._git.run(
+                    directory, "pull", "--progress", "--no-recurse-submodules", progress_label=repoName
+                )
+
+        # Step 4: Update the submodules that don't match the commits recorded for them!
+        submodules = self._get_outdated_submodules(directory)
+        if submodules:
+            print("  Updating submodules...")
+            update_options = ["--depth", "1"] if shallow_submodules else []
+            if clone_filter:
+                update_options.append(f"--filter={clone_filter}")
+            with self._time_phase("fna_submodules"):
+                self._update_submodules(directory, submodules, update_options, use_mirror)
+        else:
+            print("  Submodules are up to date")
+
+        print("  Done!")
+
+    def _checkout_commit(
+            self, directory: str, repo: str, repo_name: str, commit: str, depth: int, use_mirror: bool
+    ) -> None:
+        """Moves a repository's current branch (or detached HEAD) to a commit, fetching it only if it isn't available.
+        
+        Args:
+            directory (str): The repository's working tree.
+            repo (str): The URL of the repository.
+            repo_name (str): The name of the repository.
+            commit (str): The commit to check out.
+            depth (int): The repository's clone depth, 0 for the full history.
+            use_mirror (bool): Whether the repository borrows its objects from the shared per-user mirror.
+        """
+        if self._git.run(directory, "rev-parse", "HEAD") == commit:
+            print(f"  {repo_name} is at the locked commit")
+            return
+
+        if not self._has_commit(directory, commit) and use_mirror:
+            self._add_alternate(self._get_git_dir(directory), self._refresh_mirror(repo))
+        if not self._has_commit(directory, commit):
+            if self._offline:
+                raise Exception(f"The locked commit {commit} of {repo_name} isn't available offline")
+            print(f"  Fetching the locked commit of {repo_name}...")
+            self._git.run(
+                directory, "fetch", "--progress", "--no-recurse-submodules",
+                *([f"--depth={depth}"] if depth > 0 else []), "origin", commit, progress_label=repo_name
+            )
+
+        # Like a pull, keep any local changes that don't conflict
+        print(f"  Checking out the locked commit {commit[:12]} of {repo_name}...")
+        self._git.run(directory, "reset", "--keep", commit)
+
+    def _has_commit(self, directory: str, commit: str) -> bool:
+        """Checks whether a commit is available in a repository, including through its alternates.
+        
+        Args:
+            directory (str): The repository's working tree.
+            commit (str): The commit.
+        
+        Returns:
+            bool: True if the commit is available.
+        """
+        return self._git.run(directory, "rev-parse", "--verify", "--quiet", f"{commit}^{{commit}}", check=False) != ""
+
+    def _get_submodule_commits(self, directory: str, recursive: bool = False) -> dict[str, str]:
+        """Gets the commits the submodules of a repository have checked out.
+        
+        Args:
+            directory (str): The repository's working tree.
+            recursive (bool, optional): Whether to include nested submodules. Defaults to False (top level only).
+        
+        Returns:
+            dict[str, str]: The checked out commit of each initialised submodule, keyed by its path relative to the
+                repository's working tree.
+        """
+        commits = {}
+        status_options = ["--recursive"] if recursive else []
+        for line in self._git.run(directory, "submodule", "status", *status_options).splitlines():
+            if not line or line[0] == "-":
+                continue
+            commit, path = line[1:].split(" ")[:2]
+            commits[path] = commit
+        return commits
+
+    def _read_lock(self) -> dict | None:
+        """Reads the project's lock file.
+        
+        Returns:
+            dict | None: The lock file, or None if there isn't one.
+        
+        Raises:
+            Exception: If the lock file was written by a newer version of this script.
+        """
+        if not os.path.isfile(self._lock_path):
+            return None
+        with open(self._lock_path, "r") as file:
+            lock = json.load(file)
+        if lock.get("version") != self.LOCK_FILE_VERSION:
+            raise Exception(f"Unsupported lock file version {lock.get('version')} in {self._lock_path}")
+        return lock
+
+    def _write_lock(self, run_id: str, artifacts: list[FnaLibsArtifact]) -> None:
+        """Records the installed FNA commit, its submodule commits and the fnalibs workflow run in the lock file.
+        
+        Every artifact of the run is recorded, not just those installed for the selected platforms, so that the lock
+        file can be shared by developers on different platforms.
+        
+        Args:
+            run_id (str): The ID of the installed fnalibs workflow run.
+            artifacts (list[FnaLibsArtifact]): All the artifacts of the workflow run.
+        """
+        with open(f"{self._lock_path}.tmp", "w") as file:
+            json.dump(self._create_lock(run_id, artifacts), file, indent=2)
+            file.write("\n")
+        os.replace(f"{self._lock_path}.tmp", self._lock_path)
+
+    def _create_lock(self, run_id: str, artifacts: list[FnaLibsArtifact]) -> dict:
+        """Creates a lock file pinning the installed FNA commit, its submodule commits and the given fnalibs artifacts.
+        
+        Args:
+            run_id (str): The ID of the fnalibs workflow run.
+            artifacts (list[FnaLibsArtifact]): The artifacts of the workflow run to pin.
+        
+        Returns:
+            dict: The lock file.
+        """
+        return {
+            "version": self.LOCK_FILE_VERSION,
+            "fna": {
+                "repository": self._git.run(self._fna_repo_install_path, "remote", "get-url", "origin"),
+                "commit": self._git.run(self._fna_repo_install_path, "rev-parse", "HEAD"),
+                "submodules": dict(sorted(self._get_submodule_commits(self._fna_repo_install_path).items())),
+            },
+            "fnalibs": {
+                "run_id": run_id,
+                "artifacts": [asdict(artifact) for artifact in sorted(artifacts, key=lambda artifact: artifact.id)],
+            },
+        }
+
+    def _check_locked_submodules(self, lock: dict) -> None:
+        """Checks that the FNA submodules are at the commits recorded in the lock file.
+        
+        The submodule commits follow from the FNA commit, so they only differ if the lock file was edited by hand or
+        the FNA repository was changed locally.
+        
+        Args:
+            lock (dict): The lock file.
+        """
+        submodule_commits = self._get_submodule_commits(self._fna_repo_install_path)
+        mismatched_paths = [
+            path for path, commit in lock["fna"]["submodules"].items() if submodule_commits.get(path) != commit
+        ]
+        if mismatched_paths:
+            print(f"  Submodules not at their locked commits: {', '.join(sorted(mismatched_paths))}")
+            print(f"  Run with the '{self.LOCK_MODE_UPDATE}' lock mode to record the current commits")
+            sys.exit(1)
+
+    def _print_git_progress(self, label: str, phase: str, percent: int) -> None:
+        """Prints the progress of a git command.
+        
+        Args:
+            label (str): What the command is working on, e.g. the repository's name.
+            phase (str): The phase git is in, e.g. "Receiving objects".
+            percent (int): How far along the phase is.
+        """
+        self._print(f"    [{label}] {phase}: {percent}%")
+
+    def _get_git_dir(self, directory: str) -> str:
+        """Gets the git directory of a repository.
+        
+        Args:
+            directory (str): The repository's working tree.
+        
+        Returns:
+            str: The absolute path to the repository's git directory.
+        """
+        return self._git.run(directory, "rev-parse", "--absolute-git-dir")
+
+    def _get_submodules(self, directory: str) -> list[GitSubmodule]:
+        """Gets the submodules declared in a repository's .gitmodules file.
+        
+        Args:
+            directory (str): The repository's working tree.
+        
+        Returns:
+            list[GitSubmodule]: The submodules, in the order they are declared.
+        """
+        if not os.path.isfile(os.path.join(directory, ".gitmodules")):
+            return []
+
+        # Each line is "submodule.<name>.<key> <value>"; the name may itself contain dots
+        values: dict[str, dict[str, str]] = {}
+        output = self._git.run(
+            directory, "config", "--file", ".gitmodules", "--get-regexp", r"^submodule\..*\.(path|url)$", check=False
+        )
+        for line in output.splitlines():
+            key, _, value = line.partition(" ")
+            name, _, field = key[len("submodule."):].rpartition(".")
+            values.setdefault(name, {})[field] = value
+        return [
+            GitSubmodule(name=name, path=fields["path"], url=fields.get("url", ""))
+            for name, fields in values.items() if "path" in fields
+        ]
+
+    def _is_up_to_date(self, directory: str) -> bool:
+        """Checks whether a repository's HEAD matches the remote branch it tracks, with a single ls-remote.
+        
+        Args:
+            directory (str): The repository's working tree.
+        
+        Returns:
+            bool: True if HEAD matches the remote branch, False if it doesn't or the remote branch is unknown.
+        """
+        branch = self._git.run(directory, "symbolic-ref", "--quiet", "HEAD", check=False)
+        if not branch:
+            return False
+        upstream = self._git.run(
+            directory, "for-each-ref", "--format=%(upstream:remotename) %(upstream:remoteref)", branch
+        ).split()
+        if len(upstream) != 2:
+            return False
+
+        remote_refs = self._git.run(directory, "ls-remote", *upstream)
+        if not remote_refs:
+            return False
+        return remote_refs.split()[0] == self._git.run(directory, "rev-parse", "HEAD")
+
+    def _get_outdated_submodules(self, directory: str) -> list[GitSubmodule]:
+        """Gets the submodules whose checkout, or that of a submodule nested in them, doesn't match the recorded commit.
+        
+        Args:
+            directory (str): The repository's working tree.
+        
+        Returns:
+            list[GitSubmodule]: The outdated top level submodules.
+        """
+        submodules = self._get_submodules(directory)
+        if not submodules:
+            return []
+
+        # Each line is "<state><sha> <path> (<description>)", where the state is a space if the submodule's checkout
+        # matches the commit recorded for it, or "-", "+" or "U" if it isn't initialised, differs or has conflicts
+        outdated_paths = set()
+        for line in self._git.run(directory, "submodule", "status", "--recursive").splitlines():
+            if not line or line[0] == " ":
+                continue
+            path = line[1:].split(" ")[1]
+            for submodule in submodules:
+                if path == submodule.path or path.startswith(f"{submodule.path}/"):
+                    outdated_paths.add(submodule.path)
+        return [submodule for submodule in submodules if submodule.path in outdated_paths]
+
+    def _update_submodules(
+            self, directory: str, submodules: list[GitSubmodule], update_options: list[str], use_mirror: bool
+    ) -> None:
+        """Fetches and checks out the submodules of a repository, several at the same time.
+        
+        The submodules are registered in the repository's config up front, as concurrent git processes can't all
+        write to it; nothing else writes to it while they update.  A submodule that fails to update is reported once
+        the others have finished.
+        
+        Args:
+            directory (str): The repository's working tree.
+            submodules (list[GitSubmodule]): The submodules to update.
+            update_options (list[str]): Additional options for `git submodule update`.
+            use_mirror (bool): Whether the submodules borrow their objects from the shared per-user mirrors.
+        
+        Raises:
+            Exception: If any submodule failed to update.
+        """
+        if not submodules:
+            return
+        self._git.run(directory, "submodule", "init", "--", *[submodule.path for submodule in submodules])
+        git_dir = self._get_git_dir(directory)
+
+        def update_submodule(submodule: GitSubmodule) -> float:
+            start = time.perf_counter()
+            if not use_mirror or submodule.url.startswith("."):
+                self._git.run(
+                    directory, "submodule", "update", "--init", "--progress", "--recursive", *update_options, "--",
+                    submodule.path, progress_label=submodule.path
+                )
+                return time.perf_counter() - start
+
+            # A new submodule is cloned referencing its mirror, an existing one gets the mirror added as an alternate;
+            # either way the commit it needs is usually already in the mirror and doesn't have to be fetched again.
+            # Offline, a new submodule is cloned from the mirror itself, by overriding its URL for this one command
+            # rather than in the shared config, and then pointed back at its real URL
+            mirror_path = self._refresh_mirror(submodule.url)
+            submodule_git_dir = os.path.join(git_dir, "modules", submodule.name)
+            clone_from_mirror = self._offline and not os.path.isdir(submodule_git_dir)
+            if os.path.isdir(submodule_git_dir):
+                self._add_alternate(submodule_git_dir, mirror_path)
+            url_override = ["-c", f"submodule.{submodule.name}.url={mirror_path}"] if clone_from_mirror else []
+            self._git.run(
+                directory, *url_override, "submodule", "update", "--init", "--progress", "--reference", mirror_path,
+                *update_options, "--", submodule.path, progress_label=submodule.path
+            )
+            if clone_from_mirror:
+                self._git.run(os.path.join(directory, submodule.path), "remote", "set-url", "origin", submodule.url)
+
+            # Nested submodules have their own mirrors
+            submodule_directory = os.path.join(directory, submodule.path)
+            self._update_submodules(
+                submodule_directory, self._get_outdated_submodules(submodule_directory), update_options, use_mirror
+            )
+            return time.perf_counter() - start
+
+        failed_submodules = []
+        num_workers = min(self._submodule_jobs, len(submodules))
+        with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="submodule") as executor:
+            futures = {executor.submit(update_submodule, submodule): submodule.path for submodule in submodules}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    self._print(f"    [{path}] Updated in {future.result():.2f}s")
+                except Exception as e:
+                    self._print(f"    [{path}] Failed to update: {str(e).strip()}")
+                    failed_submodules.append(path)
+
+        if failed_submodules:
+            raise Exception(f"Failed to update submodules: {', '.join(sorted(failed_submodules))}")
+
+    def _can_use_mirror(self, depth: int, clone_filter: str, shallow_submodules: bool) -> bool:
+        """Checks if a checkout borrows its objects from the shared per-user mirrors.
+        
+        Only full clones do; a mirror holds the complete history and every blob, which would undo the saving of a
+        shallow or partial clone.
+        
+        Args:
+            depth (int): The history depth of the clone, or 0 for the full history.
+            clone_filter (str): The partial clone filter of the clone, or an empty string for none.
+            shallow_submodules (bool): Whether the submodules are cloned with a depth of 1.
+        
+        Returns:
+            bool: True if the checkout borrows from the mirrors, False otherwise.
+        """
+        return self._use_shared_mirror and depth == 0 and not clone_filter and not shallow_submodules
+
+    def _get_clone_options(self) -> list[str]:
+        """Gets the git clone options for the configured clone depth and partial clone filter.
+        
+        Returns:
+            list[str]: The additional git clone options.
+        """
+        options = []
+        if self._clone_depth > 0:
+            options.append(f"--depth={self._clone_depth}")
+        if self._clone_filter:
+            options.append(f"--filter={self._clone_filter}")
+        return options
+
+    def _refresh_mirror(self, url: str) -> str:
+        """Creates or refreshes the shared per-user bare mirror of a repository, at most once per run.
+        
+        The mirror tracks the repository's branches and tags.  Checkouts borrow its objects through git alternates,
+        so it never prunes objects it no longer references; they may still be used by an older checkout.
+        
+        Args:
+            url (str): The URL of the repository.
+        
+        Returns:
+            str: The path to the mirror.
+        """
+        mirror_path = self._get_mirror_path(url)
+        with self._mirror_locks_lock:
+            mirror_lock = self._mirror_locks.setdefault(mirror_path, threading.Lock())
+        with mirror_lock:
+            if mirror_path in self._refreshed_mirrors:
+                return mirror_path
+
+            # Other installs on this machine share the mirror, so only one process may create or refresh it at a time
+            os.makedirs(self._mirror_directory, exist_ok=True)
+            with InterProcessLock(f"{mirror_path}.lock"):
+                self._create_or_refresh_mirror(url, mirror_path)
+            self._refreshed_mirrors.add(mirror_path)
+        return mirror_path
+
+    def _create_or_refresh_mirror(self, url: str, mirror_path: str) -> None:
+        """Creates the shared per-user bare mirror of a repository, or fetches into it if it exists.
+
+        Args:
+            url (str): The URL of the repository.
+            mirror_path (str): The path to the mirror.
+        """
+        mirror_name = os.path.basename(mirror_path)
+        if self._offline:
+            if not os.path.isfile(os.path.join(mirror_path, "HEAD")):
+                raise Exception(f"There is no shared mirror of {mirror_name} to use offline")
+        elif os.path.isfile(os.path.join(mirror_path, "HEAD")):
+            self._print(f"  Refreshing the shared mirror of {mirror_name}...")
+            self._git.run(mirror_path, "fetch", "--progress", "--tags", "origin", progress_label=mirror_name)
+        else:
+            # Clone next to the mirror and move it into place once complete, so an interrupted clone is never used
+            self._print(f"  Creating the shared mirror of {mirror_name}...")
+            partial_path = f"{mirror_path}.partial"
+            self._remove_file_system_entry(partial_path)
+            self._git.run(
+                self._mirror_directory, "clone", "--progress", "--bare", url, partial_path,
+                progress_label=mirror_name
+            )
+            self._git.run(partial_path, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+            self._git.run(partial_path, "config", "gc.pruneExpire", "never")
+            self._remove_file_system_entry(mirror_path)
+            os.rename(partial_path, mirror_path)
+
+    def _get_mirror_path(self, url: str) -> str:
+        """Gets the path of the shared per-user bare mirror of a repository.
+        
+        The mirror is named after the repository and a hash of its normalised URL, so that repositories with the same
+        name from different owners or hosts get their own mirrors.
+        
+        Args:
+            url (str): The URL of the repository.
+        
+        Returns:
+            str: The absolute path to the mirror.
+        """
+        normalised_url = url.strip().rstrip("/").removesuffix(".git")
+        parts = urlsplit(normalised_url)
+        if parts.scheme and parts.netloc:
+            normalised_url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+        url_hash = hashlib.sha256(normalised_url.encode("utf-8")).hexdigest()[:16]
+        mirror_name = f"{os.path.basename(normalised_url)}-{url_hash}.git"
+        return os.path.abspath(os.path.join(self._mirror_directory, mirror_name))
+
+    def _repair_alternates(self, directory: str, repo: str) -> None:
+        """Points a checkout and its submodules at their current mirrors if they borrow from any other location.
+        
+        Checkouts made before the mirrors moved out of the per-user cache directory (or were keyed by URL) borrow from
+        mirrors there, which break the checkout once the cache is cleared.  Their git directories get the current
+        mirror added as an alternate, and alternates that no longer exist are dropped.  A current mirror that was
+        deleted is recreated before the checkout is used.  Nothing is done, and nothing fetched, for git directories
+        that already borrow from their existing current mirror only.
+        
+        Args:
+            directory (str): The repository's working tree.
+            repo (str): The URL of the repository.
+        """
+        git_dir = self._get_git_dir(directory)
+        git_dirs = [(git_dir, repo)] + [
+            (os.path.join(git_dir, "modules", submodule.name), submodule.url)
+            for submodule in self._get_submodules(directory) if not submodule.url.startswith(".")
+        ]
+        for borrowing_git_dir, url in git_dirs:
+            alternates = self._read_alternates(borrowing_git_dir)
+            mirror_path = self._get_mirror_path(url)
+            mirror_exists = os.path.isfile(os.path.join(mirror_path, "HEAD"))
+            if not alternates or (mirror_exists and alternates == [os.path.join(mirror_path, "objects")]):
+                continue
+            if self._offline and not mirror_exists:
+                continue
+            self._add_alternate(borrowing_git_dir, self._refresh_mirror(url))
 
-    FNA_LIBS_REPO_WORKFLOW_NAME: str = "ci.yml"
-    """str: The name of the workflow for the FNA libs repository."""
+    @staticmethod
+    def _read_alternates(git_dir: str) -> list[str]:
+        """Reads the object directories a repository borrows objects from.
+        
+        Args:
+            git_dir (str): The repository's git directory.
+        
+        Returns:
+            list[str]: The borrowed object directories, empty if the repository doesn't borrow objects.
+        """
+        alternates_path = os.path.join(git_dir, "objects", "info", "alternates")
+        if not os.path.isfile(alternates_path):
+            return []
+        with open(alternates_path, "r") as f:
+            return [line.strip() for line in f if line.strip()]
 
-    def __init__(self, directory: str, personal_access_token: str) -> None:
-        """Initializes the FNAUpdater.
+    @classmethod
+    def _add_alternate(cls, git_dir: str, mirror_path: str) -> None:
+        """Lets a repository borrow objects from a mirror by adding the mirror to its git alternates.
         
-        Sets up the necessary directories and installs the virtualenv package.  It also sets up the virtual environment
-        if one doesn't already exist.
+        Alternates that no longer exist are dropped at the same time, as git reports an error for each of them.
         
         Args:
-            directory (str): The base directory for FNA installation and related files.
+            git_dir (str): The repository's git directory.
+            mirror_path (str): The path to the bare mirror.
         """
-        self._personal_access_token = personal_access_token
-        self._base_directory = directory
-        self._fna_repo_install_path = os.path.join(directory, "FNA")
-        self._fna_libs_install_path = os.path.join(directory, "fnalibs")
-        self._fna_libs_install_cache_path = os.path.join(directory, "fnalibs_cache")
+        alternates_path = os.path.join(git_dir, "objects", "info", "alternates")
+        mirror_objects_path = os.path.abspath(os.path.join(mirror_path, "objects"))
+        alternates = cls._read_alternates(git_dir)
+        existing_alternates = [alternate for alternate in alternates if os.path.isdir(alternate)]
+        if mirror_objects_path in existing_alternates and existing_alternates == alternates:
+            return
 
-        self._fna_libs_repo = self.FNA_LIBS_REPO_FORMAT.format(pre="", post="")
-        self._fna_libs_repo_api = self.FNA_LIBS_REPO_FORMAT.format(pre="api.", post="repos/")
+        if mirror_objects_path not in existing_alternates:
+            existing_alternates.append(mirror_objects_path)
+        os.makedirs(os.path.dirname(alternates_path), exist_ok=True)
+        with open(f"{alternates_path}.tmp", "w") as f:
+            f.writelines(f"{alternate}\n" for alternate in existing_alternates)
+        os.replace(f"{alternates_path}.tmp", alternates_path)
 
-        self._manage_directory(directory=self._base_directory, delete_directory_if_exists=False,
-                               create_directory_if_not_exists=True)
+    def _read_clone_settings(self, directory: str) -> tuple[int, str, bool]:
+        """Reads the clone settings recorded in a repository's config.
+        
+        Args:
+            directory (str): The repository's working tree.
+        
+        Returns:
+            tuple[int, str, bool]: The clone depth (0 for the full history), the partial clone filter and whether the
+                submodules are shallow.
+        """
+        settings = {}
+        for line in self._git.run(directory, "config", "--get-regexp", r"^fnaupdator\.", check=False).splitlines():
+            key, _, value = line.partition(" ")
+            settings[key] = value
+        depth = int(settings.get("fnaupdator.depth") or 0)
+        clone_filter = settings.get("fnaupdator.filter", "")
+        shallow_submodules = settings.get("fnaupdator.shallowsubmodules", "false").lower() == "true"
+        return depth, clone_filter, shallow_submodules
+
+    def _write_clone_settings(self, directory: str, depth: int, clone_filter: str, shallow_submodules: bool) -> None:
+        """Records the clone settings in a repository's config so that later updates keep to them.
         
-        env_manager = VirtualEnvironmentManager(directory=self._base_directory)
-        env_manager.setup_environment()
-        env_manager.install_package("GitPython")
-        env_manager.install_package("requests")
+        Args:
+            directory (str): The repository's working tree.
+            depth (int): The clone depth, 0 for the full history.
+            clone_filter (str): The partial clone filter, empty for none.
+            shallow_submodules (bool): Whether the submodules are shallow.
+        """
+        self._git.run(directory, "config", "fnaupdator.depth", str(depth))
+        self._git.run(directory, "config", "fnaupdator.filter", clone_filter)
+        self._git.run(directory, "config", "fnaupdator.shallowsubmodules", "true" if shallow_submodules else "false")
 
-    def execute(self) -> None:
-        """Executes the FNA update or installation process.
+    def _install_fna_libs_manager(
+            self, locked_run: tuple[str, list[FnaLibsArtifact]] | None = None
+    ) -> tuple[str, list[FnaLibsArtifact]]:
+        """Manages the installation of FNA libraries.
         
-        Based on the provided mode, either updates or installs FNA, then installs the required FNA libraries.
+        Downloads and extracts the FNA libraries for all supported platforms.  If the installed libraries already match
+        the latest workflow run (according to the install manifest), nothing is deleted, downloaded or extracted.
+        
+        The new libraries are built in a staging directory and only swapped in once everything has been extracted, so
+        the installed libraries are never half-populated.  The previous generation is kept for `rollback_fna_libs`.
         
         Args:
-            mode (str): The mode of operation, either "update" or "install".
+            locked_run (tuple[str, list[FnaLibsArtifact]] | None, optional): The workflow run and its artifacts to
+                install, as recorded in the lock file, instead of asking GitHub for the latest run. Defaults to None.
+        
+        Returns:
+            tuple[str, list[FnaLibsArtifact]]: The ID of the installed workflow run and all of its artifacts.
         """
-        # Step 1: Install or update the FNA repo
-        self._clone_or_update_repo(
-            repo=self.FNA_REPO, directory=self._fna_repo_install_path, clone_multi_options=["--recursive"]
-        )
+        # Finish off a swap that was interrupted part way through
+        if not os.path.exists(self._fna_libs_install_path) and os.path.isdir(self._fna_libs_previous_path):
+            print("Restoring FNA libs from an interrupted update...")
+            self._rename_with_retry(self._fna_libs_previous_path, self._fna_libs_install_path)
+            if os.path.isfile(self._fna_libs_previous_manifest_path):
+                self._rename_with_retry(self._fna_libs_previous_manifest_path, self._fna_libs_manifest_path)
 
-        # Step 2: Install the FNA libs
-        self._install_fna_libs_manager()
+        if locked_run is not None:
+            run_id, all_artifacts = locked_run
+            print(f"Using the locked fnalibs workflow run {run_id}...")
+        else:
+            with self._time_phase("fnalibs_resolve"):
+                # get the latest run for the fnalibs workflow
+                print("Determining latest fnalibs workflow run...")
+                run_id = self._get_latest_run_for_workflow()
+                print(f"  Run ID: {run_id}")
 
-        # Step 3: ???
-        # Step 4: Done!
-        print("Done!")
-        sys.exit(0)
+                # get the artifacts for the workflow run
+                print("Getting artifacts for workflow run...")
+                all_artifacts = self._get_artifacts_for_workflow_run(run_id)
+        artifacts = self._select_artifacts(all_artifacts)
+        print(f"  Artifacts: {', '.join(artifact.name for artifact in all_artifacts)}")
+        if not artifacts:
+            print(f"  No artifacts found for the selected platform(s) {self._describe_platforms()}")
+            sys.exit(1)
+        print(f"  Selected for {self._describe_platforms()}: {', '.join(artifact.name for artifact in artifacts)}")
 
-    @cached_property
-    def _get_request_headers(self) -> dict[str, str]:
-        """Gets the request headers for the GitHub API calls."""
-        return {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"Bearer {self._personal_access_token}",
-            "X-GitHub-Api-Version": "2022-11-28",
-        }
-    
-    def _manage_directory(
-            self, *, directory: str, delete_directory_if_exists: bool, create_directory_if_not_exists: bool
-    ) -> None:
-        """Manages a directory, ensuring it exists and is a directory, not a file.
+        # Nothing to do if the selected artifacts of the latest run are already installed. If only some are, just add
+        # the missing ones.
+        manifest = self._get_installed_fna_libs_manifest(run_id)
+        installed_artifact_ids = {artifact["id"] for artifact in manifest["artifacts"]} if manifest else set()
+        missing_artifacts = [artifact for artifact in artifacts if artifact.id not in installed_artifact_ids]
+        if not missing_artifacts:
+            print("  FNA libs are already up to date!")
+            return run_id, all_artifacts
+
+        # Build the new generation in the staging directory. When adding artifacts, start from (hard links to) the
+        # currently installed files. The extraction cache is no longer used, but may be left over from an older version
+        # of this script.
+        self._remove_file_system_entry(self._fna_libs_install_cache_path)
+        self._remove_file_system_entry(self._fna_libs_staging_path)
+        self._remove_file_system_entry(self._fna_libs_staging_manifest_path)
+        installed_files = {}
+        installed_artifacts = [artifact for artifact in all_artifacts if artifact.id in installed_artifact_ids]
+        if manifest is not None:
+            print(f"  Adding artifacts: {', '.join(artifact.name for artifact in missing_artifacts)}")
+            installed_files = manifest["files"]
+            self._link_tree(self._fna_libs_install_path, self._fna_libs_staging_path)
+        else:
+            os.makedirs(self._fna_libs_staging_path)
+        artifacts = missing_artifacts
+
+        # Download all artifacts and extract them to the common location. Each worker downloads and then extracts a
+        # single artifact, so the download of one artifact overlaps the extraction of another.
+        num_workers = min(self._download_concurrency, len(artifacts))
+        print(f"Downloading and extracting artifacts ({num_workers} worker(s))...")
+        failed_artifacts = []
+        with self._time_phase("fnalibs_install"), \
+                ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="fnalibs") as executor:
+            futures = {
+                executor.submit(
+                    self._download_and_extract_artifact, run_id, artifact, self._fna_libs_staging_path, i + 1,
+                    len(artifacts)
+                ): artifact.name
+                for i, artifact in enumerate(artifacts)
+            }
+            for future in as_completed(futures):
+                try:
+                    artifact_files = future.result()
+                except Exception as e:
+                    self._print(f"  [{futures[future]}] Unexpected error: {e}")
+                    artifact_files = None
+                if artifact_files is None:
+                    failed_artifacts.append(futures[future])
+                else:
+                    installed_files.update(artifact_files)
+
+        if failed_artifacts:
+            print(f"  Failed to install artifacts: {', '.join(sorted(failed_artifacts))}")
+            print("  The installed FNA libs have not been changed.")
+            self._remove_file_system_entry(self._fna_libs_staging_path)
+            sys.exit(1)
+
+        # Record what was installed so that the next run can skip the install if nothing has changed, then swap the
+        # new generation in
+        with self._time_phase("fnalibs_activate"):
+            self._write_fna_libs_manifest(
+                self._fna_libs_staging_manifest_path, run_id, installed_artifacts + artifacts, installed_files
+            )
+            self._activate_fna_libs_staging()
+
+        # Files no project links to any more can go once they've been unused for a while
+        if self._file_store is not None:
+            removed = self._file_store.prune(self.STORE_PRUNE_AGE_DAYS)
+            if removed:
+                print(f"  Removed {removed} unused file(s) from the shared store")
+
+        return run_id, all_artifacts
+
+    def rollback_fna_libs(self) -> None:
+        """Swaps the installed FNA libs with the previously installed generation."""
+        print("Rolling back FNA libs...")
+        if not os.path.isdir(self._fna_libs_previous_path):
+            print("  No previous FNA libs generation to roll back to!")
+            sys.exit(1)
+
+        # The current generation becomes the staged one, so rolling back twice gets back to where we started
+        self._remove_file_system_entry(self._fna_libs_staging_path)
+        self._remove_file_system_entry(self._fna_libs_staging_manifest_path)
+        self._rename_with_retry(self._fna_libs_previous_path, self._fna_libs_staging_path)
+        if os.path.isfile(self._fna_libs_previous_manifest_path):
+            self._rename_with_retry(self._fna_libs_previous_manifest_path, self._fna_libs_staging_manifest_path)
+        self._activate_fna_libs_staging()
+        print("  Done!")
+
+    def _activate_fna_libs_staging(self) -> None:
+        """Swaps the staged FNA libs generation in, keeping the current one as the previous generation.
         
-        Args:
-            directory (str): The path to the directory to manage.
-            create_directory_if_not_exists (bool): Whether to create the directory if it doesn't exist.
+        Directories can't be atomically replaced by a rename on every platform, so the current generation is first
+        renamed out of the way and the staged generation is then renamed into place.  If the process dies in between,
+        the next install restores the previous generation.
         """
-        if os.path.exists(directory):
-            if os.path.isfile(directory):
-                raise Exception(f"Directory {directory} already exists and is a file?")
+        self._remove_file_system_entry(self._fna_libs_previous_path)
+        self._remove_file_system_entry(self._fna_libs_previous_manifest_path)
+        if os.path.exists(self._fna_libs_install_path):
+            if os.path.isfile(self._fna_libs_manifest_path):
+                self._rename_with_retry(self._fna_libs_manifest_path, self._fna_libs_previous_manifest_path)
+            self._rename_with_retry(self._fna_libs_install_path, self._fna_libs_previous_path)
+        else:
+            self._remove_file_system_entry(self._fna_libs_manifest_path)
 
-            if delete_directory_if_exists:
-                self._remove_file_system_entry(directory)
+        self._rename_with_retry(self._fna_libs_staging_path, self._fna_libs_install_path)
+        if os.path.isfile(self._fna_libs_staging_manifest_path):
+            os.replace(self._fna_libs_staging_manifest_path, self._fna_libs_manifest_path)
 
-        if create_directory_if_not_exists and not os.path.exists(directory):
-            os.makedirs(directory)
+    def _rename_with_retry(self, source: str, destination: str) -> None:
+        """Renames a file or directory, retrying for a short while if it is in use.
+        
+        Args:
+            source (str): The path to rename.
+            destination (str): The new path, which must not exist.
+        
+        Raises:
+            OSError: If the rename still fails after RENAME_ATTEMPTS attempts.
+        """
+        for attempt in range(1, self.RENAME_ATTEMPTS + 1):
+            try:
+                os.rename(source, destination)
+                return
+            except PermissionError:
+                if attempt == self.RENAME_ATTEMPTS:
+                    raise
+                time.sleep(0.1 * attempt)
 
     @staticmethod
-    def _remove_file_system_entry(path: str) -> None:
-        """Removes a file or directory from the file system.
+    def _link_tree(source: str, destination: str) -> None:
+        """Recreates a directory tree with hard links to the original files, copying files that can't be linked.
         
-        Deletes the specified file or directory.  If the path does not exist, no action is taken.
-                
         Args:
-            path (str): The path to the file or directory to remove.
+            source (str): The directory to recreate.
+            destination (str): The directory to create, which must not exist.
         """
-        if not os.path.exists(path):
-            return
+        for root, _, file_names in os.walk(source):
+            target_root = os.path.join(destination, os.path.relpath(root, source))
+            os.makedirs(target_root, exist_ok=True)
+            for file_name in file_names:
+                try:
+                    os.link(os.path.join(root, file_name), os.path.join(target_root, file_name))
+                except OSError:
+                    shutil.copy2(os.path.join(root, file_name), os.path.join(target_root, file_name))
 
-        if os.path.isfile(path):
-            os.remove(path)
-        else:
-            shutil.rmtree(path)
+    def _describe_platforms(self) -> str:
+        """Describes the selected platforms.
+        
+        Returns:
+            str: The selected platforms, e.g. "linux-x64, windows".
+        """
+        if self._platforms is None:
+            return self.ALL_PLATFORMS
+        return ", ".join(
+            f"{platform_name}-{architecture}" if architecture else platform_name
+            for platform_name, architecture in self._platforms
+        )
 
-    def _clone_or_update_repo(self, repo: str, directory: str, clone_multi_options: list[str]) -> None:
-        """Clones or updates a Git repository with specified options.
+    def _get_installed_fna_libs_manifest(self, run_id: str) -> dict | None:
+        """Gets the install manifest if the installed FNA libs are from the given workflow run.
         
-        Handles repository management by either cloning a new repository or updating an existing one, including submodule initialization.
+        Compares the run id against the install manifest and checks that every file the manifest lists is still
+        installed with its recorded size.
         
         Args:
-            repo: The URL of the Git repository to clone or update.
-            directory: The local directory path where the repository will be cloned or updated.
-            clone_multi_options: Additional options to use during repository cloning.
+            run_id (str): The ID of the workflow run to compare against.
         
         Returns:
-            None
-        
-        Raises:
-            Exception: If the specified directory is a file instead of a directory.
+            dict | None: The install manifest, or None if the installed FNA libs aren't (intact and) from the workflow
+                run.
         """
-        from git import Repo
+        manifest = self._read_fna_libs_manifest()
+        if manifest is None or str(manifest.get("run_id")) != str(run_id):
+            return None
 
-        # Step 1: Check if we need to clone or update the repo...
-        clone = True
-        update = False
+        for relative_path, file_info in manifest.get("files", {}).items():
+            path = os.path.join(self._fna_libs_install_path, relative_path)
+            if not os.path.isfile(path) or os.path.getsize(path) != file_info["size"]:
+                return None
+        return manifest
 
-        repoName = os.path.basename(repo)
+    def _read_fna_libs_manifest(self) -> dict | None:
+        """Reads the FNA libs install manifest.
+        
+        Returns:
+            dict | None: The install manifest, or None if there is no (readable) manifest.
+        """
+        try:
+            with open(self._fna_libs_manifest_path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
 
-        if os.path.exists(directory):
-            if os.path.isfile(directory):
-                raise Exception(f"Directory {directory} already exists and is a file?")
-            if os.path.exists(os.path.join(directory, ".git")):
-                update = True
-                clone = False
+    def _write_fna_libs_manifest(
+            self, path: str, run_id: str, artifacts: list[FnaLibsArtifact], files: dict[str, dict]
+    ) -> None:
+        """Writes the FNA libs install manifest describing the currently installed FNA libs.
+        
+        The manifest records the workflow run and artifacts the FNA libs were installed from, the platforms they cover
+        and the size and SHA-256 hash of every installed file.
+        
+        Args:
+            path (str): The path to write the manifest to.
+            run_id (str): The ID of the workflow run that was installed.
+            artifacts (list[FnaLibsArtifact]): The artifacts that were installed.
+            files (dict[str, dict]): The size and SHA-256 hash of every installed file, keyed by its path relative to
+                the FNA libs directory.
+        """
+        manifest = {
+            "run_id": run_id,
+            "platforms": sorted({
+                f"{artifact.platform}-{artifact.architecture}" if artifact.architecture else artifact.platform
+                for artifact in artifacts
+                if artifact.platform is not None
+            }),
+            "artifacts": [
+                {
+                    "id": artifact.id,
+                    "name": artifact.name,
+                    "digest": artifact.digest,
+                    "platform": artifact.platform,
+                    "architecture": artifact.architecture,
+                }
+                for artifact in artifacts
+            ],
+            "files": dict(sorted(files.items())),
+        }
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(f"{path}.tmp", path)
 
-        # Step 2: Clone the repo?
-        if clone:
-            try:
-                print(f"Cloning {repoName}...")
-                Repo.clone_from(repo, directory, multi_options=clone_multi_options)
-            except Exception:
-                print("  Repo already exists, attempting to update...")
-                update = True
+    def _print(self, message: str) -> None:
+        """Prints a message without interleaving it with messages from other worker threads.
 
-        # Step 3: Update the repo?
-        if update:
-            print(f"  Updating {repoName}...")
-            repo = Repo(directory)
-            repo.remotes.origin.pull()
+        Args:
+            message (str): The message to print.
+        """
+        with self._print_lock:
+            print(message, flush=True)
+
+    def _get_api_json(self, url: str) -> tuple[int, dict]:
+        """Makes a GitHub API GET request, going through the API response cache.
+        
+        A cached response younger than the cache's time-to-live is returned without contacting GitHub.  Otherwise a
+        conditional request is made and a 304 Not Modified response is answered from the cache.
+        
+        Args:
+            url (str): The URL to request.
+        
+        Returns:
+            tuple[int, dict]: The status code of the response (200 for cached responses) and the decoded body, which is
+                empty if the request failed.
+        """
+        data = self._api_response_cache.get_fresh(url)
+        if data is not None:
+            return 200, data
 
-        # Step 4: Update the submodules!
-        print("  Updating submodules...")
-        repo = Repo(directory)
-        for submodule in repo.submodules:
-            submodule.update(init=True, recursive=True)
+        headers = {**self._get_request_headers, **self._api_response_cache.get_validators(url)}
+        response = self._request(url, headers=headers)
+        if response.status_code == 304:
+            return 200, self._api_response_cache.revalidate(url)
+        if response.status_code != 200:
+            return response.status_code, {}
 
-        print("  Done!")
+        data = response.json()
+        self._api_response_cache.store(url, response.headers, data)
+        return 200, data
 
-    def _install_fna_libs_manager(self) -> None:
-        """Manages the installation of FNA libraries.
+    def _get_latest_run_for_workflow(self) -> str:
+        """Retrieves the newest successful workflow run of the fnalibs workflow that has artifacts.
+        
+        Makes a single query for successful runs created within the lookback window (optionally filtered by branch and
+        event), only requesting further pages if none of the runs on a page have artifacts.  The result is remembered
+        so that later calls within the API cache's time-to-live return immediately, and so that it can be used as a
+        fallback if GitHub can't be reached.
+        
+        Returns:
+            str: The ID of the newest successful workflow run with artifacts.
         
-        Downloads and extracts the FNA libraries for all supported platforms.
+        Raises:
+            SystemExit: If no suitable run is found and no run has been found before.
         """
-        # Check if directory already exists
-        self._manage_directory(
-            directory=self._fna_libs_install_cache_path, delete_directory_if_exists=True,
-            create_directory_if_not_exists=True
-        )
-        self._manage_directory(
-            directory=self._fna_libs_install_path, delete_directory_if_exists=True, create_directory_if_not_exists=True
-        )
+        parameters = {
+            "status": "success",
+            "created": f">={(datetime.now().date() - timedelta(days=self._run_lookback_days)).isoformat()}",
+            "per_page": self.RUNS_PER_PAGE,
+        }
+        if self._run_branch:
+            parameters["branch"] = self._run_branch
+        if self._run_event:
+            parameters["event"] = self._run_event
+        workflow_url = f"{self._fna_libs_repo_api}/actions/workflows/{self.FNA_LIBS_REPO_WORKFLOW_NAME}"
+        base_url = f"{workflow_url}/runs?{urlencode(parameters)}"
 
-        # get the latest run for the fnalibs workflow
-        print("Determining latest fnalibs workflow run...")
-        run_id = self._get_latest_run_for_workflow()
-        print(f"  Run ID: {run_id}")
+        # Step 1: Did we find the run for this query recently?
+        last_good_run = self._read_last_good_run()
+        if (last_good_run.get("query") == base_url
+                and time.time() - last_good_run["found_at"] <= self._api_cache_ttl_seconds):
+            return last_good_run["run_id"]
 
-        # get the artifacts for the workflow run
-        print("Getting artifacts for workflow run...")
-        artifacts = self._get_artifacts_for_workflow_run(run_id)
-        print(f"  Artifacts: {artifacts}")
+        # Step 2: Find the newest run with artifacts, one page at a time
+        status_code = 200
+        page = 1
+        while True:
+            status_code, data = self._get_api_json(f"{base_url}&page={page}")
+            runs = data.get("workflow_runs", [])
+            for run in runs:
+                _, artifacts = self._query_artifacts_for_workflow_run(run["id"])
+                if artifacts:
+                    self._write_last_good_run(base_url, run["id"])
+                    return run["id"]
+            if not runs or page * self.RUNS_PER_PAGE >= data.get("total_count", 0):
+                break
+            page += 1
 
-        # Download all artifacts and extract them to the common location
-        print("Downloading and extracting artifacts...")
-        for i, (artifact_name, artifact_download_url) in enumerate(artifacts):
-            self._download_and_extract_artifact(artifact_name, artifact_download_url, i + 1, len(artifacts))
+        # Step 3: Fall back to the last run that was known to be good
+        if last_good_run.get("run_id"):
+            print(f"  No successful workflow run with artifacts found (response code: {status_code}), "
+                  f"using the last known good run")
+            return last_good_run["run_id"]
 
-        # Clean up the cache directory
-        self._remove_file_system_entry(self._fna_libs_install_cache_path)
+        print(f"  Failed to get latest workflow run in the last {self._run_lookback_days} days, "
+              f"response code: {status_code}")
+        sys.exit(1)
 
-    def _get_latest_run_for_workflow(self) -> str:
-        """Retrieves the latest completed workflow run for a specific GitHub Actions workflow.
-        
-        This method checks the latest workflow runs for today and yesterday, returning the ID of the most recent
-        completed run.
+    def _read_last_good_run(self) -> dict:
+        """Reads the last workflow run found to have artifacts.
         
         Returns:
-            str: The ID of the latest completed workflow run, or an empty string if no run is found.
+            dict: The query used, the run id and when it was found, or an empty dict if no run has been found yet.
         """
-        import requests
+        try:
+            with open(self._last_good_run_path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
 
-        # dates to check - today and yesterday
-        dates_to_check = [
-            datetime.now().date().isoformat(),
-            (datetime.now().date() - timedelta(days=1)).isoformat(),
-        ]
-        max_i = len(dates_to_check) - 1
-
-        base_url = f"{self._fna_libs_repo_api}/actions/workflows/{self.FNA_LIBS_REPO_WORKFLOW_NAME}/runs?per_page=1&status=completed"
-        for i, day in enumerate(dates_to_check):
-            day_url = f"{base_url}&created={day}"
-            response = requests.get(day_url, headers=self._get_request_headers)
-            data = response.json() if response.status_code == 200 else {}
-            if not data or not data["workflow_runs"]:
-                if i == max_i:
-                    print(f"  Failed to get latest workflow run, response code: {response.status_code}")
-                    sys.exit(1)
-                continue
-            return data["workflow_runs"][0]["id"]
+    def _write_last_good_run(self, query: str, run_id: str) -> None:
+        """Remembers the last workflow run found to have artifacts.
+        
+        Args:
+            query (str): The workflow runs query the run was found with.
+            run_id (str): The ID of the workflow run.
+        """
+        os.makedirs(os.path.dirname(self._last_good_run_path), exist_ok=True)
+        with open(f"{self._last_good_run_path}.{os.getpid()}.tmp", "w") as file:
+            json.dump({"query": query, "run_id": run_id, "found_at": time.time()}, file)
+        os.replace(f"{self._last_good_run_path}.{os.getpid()}.tmp", self._last_good_run_path)
 
-    def _get_artifacts_for_workflow_run(self, run_id: str) -> list[tuple[str, str]]:
+    def _get_artifacts_for_workflow_run(self, run_id: str) -> list[FnaLibsArtifact]:
         """Retrieves artifact details for a specific GitHub Actions workflow run.
         
-        Fetches the names and download URLs of artifacts associated with a given workflow run ID. 
+        Fetches the ids, names, download URLs, sizes and digests of artifacts associated with a given workflow run ID. 
         
         Args:
             run_id (str): The unique identifier of the workflow run.
         
         Returns:
-            list[tuple[str, str]]: A list of tuples containing artifact names and their download URLs.
+            list[FnaLibsArtifact]: The artifacts of the workflow run.
         
         Raises:
             SystemExit: If no artifacts are found or the request fails.
         """
-        import requests
-
-        url = f"{self._fna_libs_repo_api}/actions/runs/{run_id}/artifacts"
-        response = requests.get(url, headers=self._get_request_headers)
-        data = response.json() if response.status_code == 200 else {}
-        if not data or not data["artifacts"]:
-            print(f"  Failed to get artifacts for workflow run, response code: {response.status_code}")
+        status_code, artifacts = self._query_artifacts_for_workflow_run(run_id)
+        if not artifacts:
+            print(f"  Failed to get artifacts for workflow run, response code: {status_code}")
             sys.exit(1)
+        return artifacts
+
+    def _query_artifacts_for_workflow_run(self, run_id: str) -> tuple[int, list[FnaLibsArtifact]]:
+        """Queries the unexpired artifacts of a workflow run, remembering the result for the rest of the process.
+        
+        Args:
+            run_id (str): The unique identifier of the workflow run.
+        
+        Returns:
+            tuple[int, list[FnaLibsArtifact]]: The status code of the request and the artifacts of the workflow run,
+                which is empty if the run has no artifacts or the request failed.
+        """
+        if str(run_id) in self._artifacts_by_run:
+            return 200, self._artifacts_by_run[str(run_id)]
 
-        return [(artifact["name"], artifact["archive_download_url"]) for artifact in data["artifacts"]]
+        url = f"{self._fna_libs_repo_api}/actions/runs/{run_id}/artifacts"
+        status_code, data = self._get_api_json(url)
+        artifacts = [
+            FnaLibsArtifact(
+                id=artifact["id"],
+                name=artifact["name"],
+                download_url=artifact["archive_download_url"],
+                size_in_bytes=artifact.get("size_in_bytes", 0),
+                digest=(artifact.get("digest") or "").removeprefix("sha256:"),
+            )
+            for artifact in data.get("artifacts", [])
+            if not artifact.get("expired", False)
+        ]
+        if status_code == 200:
+            self._artifacts_by_run[str(run_id)] = artifacts
+        return status_code, artifacts
 
-    def _download_and_extract_artifact(self, artifact_name: str, artifact_download_url: str, artifact_num: int,
-                                       num_artifacts: int) -> None:
-        """Downloads a specific artifact from a given URL and saves it to a local cache directory.
+    def _download_and_extract_artifact(self, run_id: str, artifact: FnaLibsArtifact, destination: str,
+                                       artifact_num: int, num_artifacts: int) -> dict[str, dict] | None:
+        """Fetches a specific artifact and extracts its contents into the given FNA libs directory.
         
-        Retrieves an artifact using a personal access token and saves it as a zip file in the specified cache location. 
+        The artifact is taken from the per-user artifact cache if it is there, otherwise it is downloaded and added to
+        the cache.  Safe to call from several worker threads at once; progress lines are prefixed with the artifact so
+        that the output of concurrent workers stays readable.
         
         Args:
-            artifact_name (str): The name to use for the downloaded artifact file.
-            artifact_download_url (str): The URL from which to download the artifact.
+            run_id (str): The ID of the workflow run the artifact belongs to.
+            artifact (FnaLibsArtifact): The artifact to fetch and extract.
+            destination (str): The FNA libs directory to extract the artifact into.
+            artifact_num (int): The position of the artifact in the list of artifacts being installed.
+            num_artifacts (int): The total number of artifacts being installed.
         
         Returns:
-            bool: True if download is successful, False otherwise.
+            dict[str, dict] | None: The size and SHA-256 hash of every installed file keyed by its path relative to the
+                FNA libs directory, or None if the artifact couldn't be fetched or extracted.
         """
-        print(f"  Downloading and extracting artifact {artifact_num}/{num_artifacts} {artifact_name}...")
-        print("    Downloading artifact...")
-        if not self._download_artifact(artifact_name, artifact_download_url):
-            print(f"      Failed to download artifact {artifact_name}")
-            sys.exit(1)
-        print(f"      Artifact {artifact_name} downloaded successfully!")
+        prefix = f"  [{artifact_num}/{num_artifacts} {artifact.name}]"
+        cache_key = self._artifact_cache.make_key(run_id, artifact)
 
-        print("    Extracting artifact...")
-        if not self._extract_artifact(artifact_name):
-            print(f"      Failed to extract artifact {artifact_name}")
-            sys.exit(1)
-        print(f"      Artifact {artifact_name} extracted successfully!")
+        # Fastest: every file of the artifact is already in the shared store
+        if self._file_store is not None:
+            installed_files = self._file_store.get_artifact_files(cache_key)
+            if installed_files is not None:
+                with self._time_phase("artifact_link"):
+                    linked = self._file_store.link_files(installed_files, destination)
+                if linked:
+                    self._print(f"{prefix} Linked {len(installed_files)} files from the shared store!")
+                    return installed_files
 
-        print("    Moving artifact subdirectories...")
-        for root, dirs, _ in os.walk(os.path.join(self._fna_libs_install_cache_path, artifact_name)):
-            for directory in dirs:
-                shutil.move(os.path.join(root, directory), self._fna_libs_install_path)
-        print(f"      Artifact {artifact_name} subdirectories moved successfully!")
-        print(f"  Artifact {artifact_name} downloaded and extracted successfully!")
+        artifact_path = self._fetch_artifact(run_id, artifact, prefix)
+        if artifact_path is None:
+            return None
+        self._print(f"{prefix} Extracting artifact...")
 
-    def _download_artifact(self, artifact_name: str, artifact_download_url: str) -> bool:
-        """Downloads a specific artifact from a given URL and saves it to a local cache directory.
+        with self._time_phase("artifact_extract"):
+            installed_files = self._extract_artifact(artifact_path, destination)
+        if installed_files is None:
+            self._print(f"{prefix} Failed to extract artifact {artifact.name}")
+            return None
+        if self._file_store is not None:
+            self._file_store.put_artifact_files(cache_key, installed_files)
+        self._print(f"{prefix} Installed successfully ({len(installed_files)} files)!")
+        return installed_files
+
+    def _fetch_artifact(self, run_id: str, artifact: FnaLibsArtifact, prefix: str) -> str | None:
+        """Gets an artifact's zip file from the per-user artifact cache, downloading it into the cache if it's missing.
+        
+        Args:
+            run_id (str): The ID of the workflow run the artifact belongs to.
+            artifact (FnaLibsArtifact): The artifact.
+            prefix (str): The prefix of the progress lines printed for the artifact.
+        
+        Returns:
+            str | None: The path to the cached artifact zip file, or None if it couldn't be downloaded.
+        """
+        cache_key = self._artifact_cache.make_key(run_id, artifact)
+        artifact_path = self._artifact_cache.get(cache_key, artifact.digest)
+        if artifact_path is not None:
+            self._print(f"{prefix} Found in artifact cache")
+            return artifact_path
+        if self._offline:
+            self._print(f"{prefix} Artifact {artifact.name} isn't available offline")
+            return None
+
+        # The partial download is shared by every install on this machine, so only one process may write it at a
+        # time; one that has to wait usually finds the artifact cached once it gets the lock
+        download_path = os.path.join(self._artifact_cache.partial_directory, f"{cache_key}.zip")
+        download_lock = InterProcessLock(f"{download_path}.lock")
+        if not download_lock.acquire(blocking=False):
+            self._print(f"{prefix} Waiting for another install downloading the artifact...")
+            download_lock.acquire()
+        try:
+            artifact_path = self._artifact_cache.get(cache_key, artifact.digest)
+            if artifact_path is not None:
+                self._print(f"{prefix} Found in artifact cache")
+                return artifact_path
+
+            self._print(f"{prefix} Downloading artifact...")
+            with self._time_phase("artifact_download"):
+                digest = self._download_artifact(artifact.name, artifact.download_url, download_path)
+            if digest is None:
+                self._print(f"{prefix} Failed to download artifact {artifact.name}")
+                return None
+            if artifact.digest and digest != artifact.digest:
+                self._print(f"{prefix} Downloaded artifact has digest {digest}, expected {artifact.digest}")
+                self._remove_file_system_entry(download_path)
+                return None
+            self._print(f"{prefix} Downloaded successfully")
+            return self._artifact_cache.put(cache_key, download_path, digest)
+        finally:
+            download_lock.release()
+
+    def _download_artifact(self, artifact_name: str, artifact_download_url: str, artifact_path: str) -> str | None:
+        """Downloads a specific artifact from a given URL and saves it to the given path.
         
-        Retrieves an artifact using a personal access token and saves it as a zip file in the specified cache location. 
+        The artifact is streamed to a `.part` file next to the final zip file, with a small journal recording how much
+        of it has been downloaded. If the download is interrupted it is resumed with an HTTP Range request, both within
+        this run (up to DOWNLOAD_ATTEMPTS times) and on the next run.
         
         Args:
             artifact_name (str): The name to use for the downloaded artifact file.
             artifact_download_url (str): The URL from which to download the artifact.
+            artifact_path (str): The path to save the artifact zip file to.
         
         Returns:
-            bool: True if download is successful, False otherwise.
+            str | None: The SHA-256 hex digest of the downloaded artifact if the download is successful, None otherwise.
         """
         import requests
-        # Download the artifact
-        response = requests.get(artifact_download_url,
-                                headers={'Authorization': f'Bearer {self._personal_access_token}'})
-        # Check if the request was successful
-        if response.status_code == 200:
-            # Open a file in write-binary mode
-            with open(os.path.join(self._fna_libs_install_cache_path, f"{artifact_name}.zip"), 'wb') as file:
-                # Write the content of the response to the file
-                file.write(response.content)
-            return True
-        return False
 
-    def _extract_artifact(self, artifact_name: str) -> bool:
-        """Extracts a specific artifact from a zip file to a designated cache directory.
+        for attempt in range(1, self.DOWNLOAD_ATTEMPTS + 1):
+            try:
+                return self._download_artifact_part(artifact_name, artifact_download_url, artifact_path)
+            except (requests.RequestException, OSError) as e:
+                self._print(
+                    f"    Download of {artifact_name} interrupted (attempt {attempt}/{self.DOWNLOAD_ATTEMPTS}): {e}"
+                )
+        return None
+
+    def _download_artifact_part(self, artifact_name: str, artifact_download_url: str, artifact_path: str) -> str | None:
+        """Downloads (or resumes downloading) an artifact into its `.part` file and renames it once complete.
+        
+        Args:
+            artifact_name (str): The name of the artifact being downloaded.
+            artifact_download_url (str): The URL from which to download the artifact.
+            artifact_path (str): The path the completed artifact zip file is saved to.
+        
+        Returns:
+            str | None: The SHA-256 hex digest of the downloaded artifact, or None if the server refused the download.
+        
+        Raises:
+            requests.RequestException: If the connection fails part way through the download.
+            OSError: If the partial download can't be written.
+        """
+        import requests
+
+        part_path = f"{artifact_path}.part"
+        journal_path = f"{part_path}.json"
+        bytes_done, digest, expected_size = self._load_download_journal(journal_path, part_path, artifact_download_url)
+
+        headers = {}
+        if bytes_done > 0:
+            headers["Range"] = f"bytes={bytes_done}-"
+            self._print(f"    Resuming {artifact_name} from {self._format_bytes(bytes_done)}...")
+
+        session_bytes = 0
+        start_time = time.perf_counter()
+        with self._request(artifact_download_url, stream=True, headers=headers) as response:
+            if response.status_code == 416 and 0 < bytes_done == expected_size:
+                # Everything was downloaded before the previous run stopped
+                pass
+            elif response.status_code == 206 and bytes_done > 0:
+                if expected_size is None:
+                    expected_size = self._get_expected_size(response, bytes_done)
+            elif response.status_code == 200:
+                # The server ignored (or we didn't send) the Range header, start from scratch
+                bytes_done = 0
+                digest = hashlib.sha256()
+                expected_size = self._get_expected_size(response, 0)
+            else:
+                self._remove_file_system_entry(part_path)
+                self._remove_file_system_entry(journal_path)
+                return None
+
+            if response.status_code != 416:
+                with open(part_path, 'r+b' if bytes_done > 0 else 'wb', buffering=self.DOWNLOAD_CHUNK_SIZE) as file:
+                    file.seek(bytes_done)
+                    last_checkpoint = bytes_done
+                    try:
+                        for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                            file.write(chunk)
+                            digest.update(chunk)
+                            bytes_done += len(chunk)
+                            session_bytes += len(chunk)
+                            if bytes_done - last_checkpoint >= self.DOWNLOAD_JOURNAL_INTERVAL:
+                                file.flush()
+                                self._write_download_journal(
+                                    journal_path, artifact_download_url, expected_size, bytes_done, digest
+                                )
+                                last_checkpoint = bytes_done
+                    finally:
+                        # Always record how far we got so that the next attempt can pick up from here
+                        file.flush()
+                        self._write_download_journal(
+                            journal_path, artifact_download_url, expected_size, bytes_done, digest
+                        )
+
+        if expected_size is not None and bytes_done != expected_size:
+            raise requests.ConnectionError(
+                f"Received {bytes_done} of {expected_size} bytes for artifact {artifact_name}"
+            )
+
+        os.replace(part_path, artifact_path)
+        self._remove_file_system_entry(journal_path)
+
+        elapsed = max(time.perf_counter() - start_time, 1e-6)
+        self._print(
+            f"    {artifact_name}: {self._format_bytes(session_bytes)} in {elapsed:.2f}s "
+            f"({self._format_bytes(session_bytes / elapsed)}/s), sha256 {digest.hexdigest()}"
+        )
+        return digest.hexdigest()
+
+    @staticmethod
+    def _get_expected_size(response, offset: int) -> int | None:
+        """Gets the total size of a download from the response headers.
+        
+        Args:
+            response (requests.Response): The response of the download request.
+            offset (int): The byte offset the response body starts at.
+        
+        Returns:
+            int | None: The total size of the download in bytes, or None if the server didn't say.
+        """
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range and not content_range.endswith("/*"):
+            return int(content_range.rsplit("/", 1)[1])
+        if "Content-Length" in response.headers:
+            return offset + int(response.headers["Content-Length"])
+        return None
 
-        Attempts to unzip an artifact file and extract its contents to a specified location. 
+    def _load_download_journal(
+            self, journal_path: str, part_path: str, url: str
+    ) -> tuple[int, "hashlib._Hash", int | None]:
+        """Loads the journal for a partial download and verifies the partial file against it.
+        
+        Any data in the partial file past the last journal checkpoint is discarded. If the journal is missing, is for a
+        different URL or doesn't match the partial file, the download starts again from the beginning.
         
         Args:
-            artifact_name (str): The name of the artifact to extract.
+            journal_path (str): The path to the journal of the partial download.
+            part_path (str): The path to the partial download.
+            url (str): The URL being downloaded.
+        
+        Returns:
+            tuple[int, hashlib._Hash, int | None]: The number of bytes already downloaded, the hash of those bytes and
+                the expected total size of the download if known.
+        """
+        digest = hashlib.sha256()
+        try:
+            with open(journal_path, "r") as file:
+                journal = json.load(file)
+            bytes_done = int(journal["bytes_done"])
+            if journal["url"] != url or os.path.getsize(part_path) < bytes_done:
+                raise ValueError("Partial download doesn't match its journal")
+
+            with open(part_path, "r+b") as file:
+                file.truncate(bytes_done)
+                while chunk := file.read(self.DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+            if digest.hexdigest() != journal["sha256"]:
+                raise ValueError("Partial download is corrupt")
+            return bytes_done, digest, journal["expected_size"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._remove_file_system_entry(part_path)
+            self._remove_file_system_entry(journal_path)
+            return 0, hashlib.sha256(), None
+
+    @staticmethod
+    def _write_download_journal(
+            journal_path: str, url: str, expected_size: int | None, bytes_done: int, digest: "hashlib._Hash"
+    ) -> None:
+        """Atomically writes the journal for a partial download.
         
+        Args:
+            journal_path (str): The path to the journal of the partial download.
+            url (str): The URL being downloaded.
+            expected_size (int | None): The expected total size of the download, if known.
+            bytes_done (int): The number of bytes written to the partial download so far.
+            digest (hashlib._Hash): The hash of the bytes written so far.
+        """
+        journal = {"url": url, "expected_size": expected_size, "bytes_done": bytes_done, "sha256": digest.hexdigest()}
+        with open(f"{journal_path}.tmp", "w") as file:
+            json.dump(journal, file)
+        os.replace(f"{journal_path}.tmp", journal_path)
+
+    @staticmethod
+    def _format_bytes(num_bytes: float) -> str:
+        """Formats a number of bytes as a human-readable string.
+
+        Args:
+            num_bytes (float): The number of bytes.
+
         Returns:
-            bool: True if extraction is successful, False otherwise.
+            str: The number of bytes using the largest fitting binary unit, e.g. "12.34 MiB".
         """
+        for unit in ("B", "KiB", "MiB", "GiB"):
+            if num_bytes < 1024:
+                return f"{num_bytes:.2f} {unit}"
+            num_bytes /= 1024
+        return f"{num_bytes:.2f} TiB"
 
+    def _extract_artifact(self, artifact_path: str, destination: str) -> dict[str, dict] | None:
+        """Extracts the subdirectories of an artifact zip file straight into the destination directory.
+        
+        The archive is read through a memory map (or, for small artifacts, a single in-memory buffer) and every member
+        is written directly to its final location, hashing it on the way.  With the shared store, every member is
+        written to the store instead and linked into place.  Files at the top level of the archive aren't part of the
+        FNA libs and are skipped.
+        
+        Args:
+            artifact_path (str): The path to the artifact zip file.
+            destination (str): The directory to extract the artifact's subdirectories into.
+        
+        Returns:
+            dict[str, dict] | None: The size and SHA-256 hash of every extracted file keyed by its path relative to the
+                destination, or None if extraction failed.
+        """
+        extracted_files = {}
         try:
-            with zipfile.ZipFile(os.path.join(self._fna_libs_install_cache_path, f"{artifact_name}.zip"),
-                                 "r") as zip_ref:
-                zip_ref.extractall(os.path.join(self._fna_libs_install_cache_path, artifact_name))
-        except Exception:
-            return False
-        return True
+            if os.path.getsize(artifact_path) <= self.SMALL_ARTIFACT_SIZE:
+                with open(artifact_path, "rb") as file:
+                    buffer = io.BytesIO(file.read())
+            else:
+                buffer = MemoryMappedFile(artifact_path)
+
+            with buffer, zipfile.ZipFile(buffer, "r") as zip_ref:
+                for member in zip_ref.infolist():
+                    parts = [
+                        part for part in member.filename.replace("\\", "/").split("/") if part not in ("", ".")
+                    ]
+                    if member.is_dir() or len(parts) < 2:
+                        continue
+                    if ".." in parts or os.path.isabs(member.filename) or ":" in parts[0]:
+                        raise Exception(f"Refusing to extract {member.filename} outside of {destination}")
+
+                    # Unlink rather than overwrite, the existing file may be a hard link into another generation
+                    target_path = os.path.join(destination, *parts)
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    self._remove_file_system_entry(target_path)
+                    if self._file_store is not None:
+                        with zip_ref.open(member) as source:
+                            digest, size = self._file_store.add(source, self.DOWNLOAD_CHUNK_SIZE, target_path)
+                        extracted_files["/".join(parts)] = {"size": size, "sha256": digest}
+                        continue
+
+                    digest = hashlib.sha256()
+                    with zip_ref.open(member) as source, open(target_path, "wb") as target:
+                        while chunk := source.read(self.DOWNLOAD_CHUNK_SIZE):
+                            target.write(chunk)
+                            digest.update(chunk)
+                    extracted_files["/".join(parts)] = {"size": member.file_size, "sha256": digest.hexdigest()}
+        except Exception as e:
+            self._print(f"    Error extracting {artifact_path}: {e}")
+            return None
+        return extracted_files
 
 
-# Get arguments
-fna_install_path = sys.argv[1].strip()  # the directory for the FNA installation
-token = sys.argv[2].strip()  # the Github Personal Access Token
+if __name__ == "__main__":
+    # Get arguments
+    parser = argparse.ArgumentParser(description="Installs or updates FNA and the FNA native libraries.")
+    parser.add_argument("directory", help="the directory for the FNA installation")
+    parser.add_argument(
+        "token", nargs="?", default="", help="the Github Personal Access Token (not needed for --import)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=FnaUpdator.DEFAULT_DOWNLOAD_CONCURRENCY,
+        help="the maximum number of fnalibs artifacts to download and extract at the same time"
+    )
+    parser.add_argument(
+        "--cache-size-mb", type=int, default=FnaUpdator.DEFAULT_CACHE_SIZE_BUDGET_MB,
+        help="the maximum size in MiB of the per-user fnalibs artifact cache"
+    )
+    parser.add_argument(
+        "--api-cache-ttl", type=int, default=FnaUpdator.DEFAULT_API_CACHE_TTL_SECONDS,
+        help="the number of seconds a cached GitHub API response is used without asking GitHub again (0 to always ask)"
+    )
+    parser.add_argument(
+        "--lookback-days", type=int, default=FnaUpdator.DEFAULT_RUN_LOOKBACK_DAYS,
+        help="the number of days to look back for a successful fnalibs workflow run"
+    )
+    parser.add_argument("--branch", default="", help="only use fnalibs workflow runs for this branch")
+    parser.add_argument("--event", default="", help="only use fnalibs workflow runs triggered by this event")
+    parser.add_argument(
+        "--platforms", default=FnaUpdator.HOST_PLATFORM,
+        help=f"comma separated platforms to install the FNA libs for, e.g. 'linux-x64,windows', "
+             f"'{FnaUpdator.HOST_PLATFORM}' (the default) or '{FnaUpdator.ALL_PLATFORMS}'"
+    )
+    parser.add_argument(
+        "--no-shared-store", action="store_true",
+        help="extract a private copy of the FNA libs instead of hard linking them from the per-user file store"
+    )
+    parser.add_argument(
+        "--depth", type=int, default=0,
+        help="the history depth of a fresh clone of the FNA repository (0, the default, for the full history)"
+    )
+    parser.add_argument(
+        "--filter", default="",
+        help="the partial clone filter for a fresh clone of the FNA repository, e.g. 'blob:none'"
+    )
+    parser.add_argument(
+        "--shallow-submodules", action="store_true", help="clone and update the FNA submodules with a depth of 1"
+    )
+    parser.add_argument(
+        "--unshallow", action="store_true",
+        help="fetch the full history of a shallow FNA repository and its submodules, and stop keeping it shallow"
+    )
+    parser.add_argument(
+        "--submodule-jobs", type=int, default=FnaUpdator.DEFAULT_SUBMODULE_JOBS,
+        help="the maximum number of FNA submodules fetched and checked out at the same time"
+    )
+    parser.add_argument(
+        "--no-shared-mirror", action="store_true",
+        help="keep a full copy of the FNA repository instead of borrowing objects from the per-user mirror"
+    )
+    parser.add_argument(
+        "--git-backend", choices=[FnaUpdator.SUBPROCESS_GIT_BACKEND, FnaUpdator.GITPYTHON_GIT_BACKEND], default="",
+        help="how to run git; defaults to calling git directly if it is on the PATH, otherwise going through GitPython "
+             "if GIT_PYTHON_GIT_EXECUTABLE points at git"
+    )
+    parser.add_argument(
+        "--lock-mode", choices=[FnaUpdator.LOCK_MODE_UPDATE, FnaUpdator.LOCK_MODE_SYNC], default="",
+        help=f"'{FnaUpdator.LOCK_MODE_UPDATE}' installs the latest FNA and FNA libs and records them in the project's "
+             f"{FnaUpdator.LOCK_FILE_NAME}, '{FnaUpdator.LOCK_MODE_SYNC}' installs exactly what it records; by default "
+             f"the lock file is synced if it exists"
+    )
+    parser.add_argument(
+        "--export", metavar="BUNDLE", default="",
+        help="install or update as usual, then pack the install into an offline bundle at this path"
+    )
+    parser.add_argument(
+        "--import", dest="import_bundle", metavar="BUNDLE", default="",
+        help="install from an offline bundle made with --export, without using the network (no token needed)"
+    )
+    parser.add_argument(
+        "--timings-file", default="", help="write the time spent in each phase of the install to this file, as JSON"
+    )
+    parser.add_argument(
+        "--rollback", action="store_true", help="swap the installed FNA libs with the previously installed generation"
+    )
+    args = parser.parse_args()
 
-updator = FnaUpdator(directory=fna_install_path, personal_access_token=token)
-updator.execute()
+    updator = FnaUpdator(
+        directory=args.directory.strip(), personal_access_token=args.token.strip(),
+        download_concurrency=args.concurrency, cache_size_budget_mb=args.cache_size_mb,
+        api_cache_ttl_seconds=args.api_cache_ttl, run_lookback_days=args.lookback_days, run_branch=args.branch,
+        run_event=args.event, platforms=args.platforms.split(","), use_shared_store=not args.no_shared_store,
+        clone_depth=args.depth, clone_filter=args.filter, shallow_submodules=args.shallow_submodules,
+        unshallow=args.unshallow, submodule_jobs=args.submodule_jobs, use_shared_mirror=not args.no_shared_mirror,
+        git_backend=args.git_backend, lock_mode=args.lock_mode, offline=bool(args.import_bundle),
+        timings_path=args.timings_file
+    )
+    if args.rollback:
+        updator.rollback_fna_libs()
+    elif args.export:
+        updator.export_bundle(args.export)
+    elif args.import_bundle:
+        updator.import_bundle(args.import_bundle)
+    else:
+        updator.execute()
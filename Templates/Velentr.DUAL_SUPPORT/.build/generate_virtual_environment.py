@@ -1,33 +1,124 @@
 """ --------------------------------------------------------------------
 Imports
 -------------------------------------------------------------------- """
+import argparse
+import glob
+import json
 import os
 import platform
+import re
 import shutil
+import site
 import subprocess
 import sys
 import zipfile
 
 from datetime import datetime, timedelta
 from functools import cached_property
-from importlib import util
+from importlib import invalidate_caches, metadata, util
 
 
 class VirtualEnvironmentManager:
     """Manages a virtual environment"""
 
-    def __init__(self, directory: str) -> None:
+    FINGERPRINT_FILE_NAME: str = "projecttools_fingerprint.json"
+    """str: The name of the file in the virtual environment recording what it was built with and what it holds."""
+
+    VENV_CREATOR: str = "venv"
+    """str: Creates virtual environments with the standard library's venv module, without pip."""
+
+    VIRTUALENV_CREATOR: str = "virtualenv"
+    """str: Creates virtual environments with virtualenv, which is installed into the host interpreter first."""
+
+    USE_VIRTUALENV_ENVIRONMENT_VARIABLE: str = "PROJECTTOOLS_USE_VIRTUALENV"
+    """str: The environment variable that, set to 1, opts in to creating virtual environments with virtualenv."""
+
+    USER_CACHE_DIRECTORY_ENVIRONMENT_VARIABLE: str = "PROJECTTOOLS_CACHE_DIR"
+    """str: The environment variable that overrides the location of the per-user cache directory."""
+
+    OFFLINE_ENVIRONMENT_VARIABLE: str = "PROJECTTOOLS_OFFLINE"
+    """str: The environment variable that, set to 1, installs packages from the wheelhouse only, never from PyPI."""
+
+    GITPYTHON_REQUIREMENT: str = "GitPython"
+    """str: The requirement the FNA updator installs GitPython with, for its GitPython git backend."""
+
+    PILLOW_REQUIREMENT: str = "Pillow==11.1.0"
+    """str: The requirement the logo generator installs Pillow with."""
+
+    REQUESTS_REQUIREMENT: str = "requests"
+    """str: The requirement the FNA updator installs requests with."""
+
+    VIRTUALENV_REQUIREMENT: str = "virtualenv"
+    """str: The requirement virtualenv is installed with, when creating virtual environments with it."""
+
+    DECLARED_REQUIREMENTS: list[str] = [
+        GITPYTHON_REQUIREMENT,
+        PILLOW_REQUIREMENT,
+        REQUESTS_REQUIREMENT,
+        VIRTUALENV_REQUIREMENT,
+    ]
+    """list[str]: Every package the build scripts may install, which `prefetch` downloads into the wheelhouse by
+    default. The scripts install them through the requirements above, so the versions can't drift apart."""
+
+    IMPORT_NAMES: dict[str, str] = {
+        "GitPython": "git",
+        "Pillow": "PIL",
+    }
+    """dict[str, str]: The module each package is imported as, for packages whose module isn't named after them."""
+
+    REQUIREMENT_PATTERN: re.Pattern = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(.*?)\s*$")
+    """re.Pattern: Splits a requirement into the package's name and version specifier, skipping any extras."""
+
+    VERSION_PATTERN: re.Pattern = re.compile(
+        r"^v?(?:\d+!)?(\d+(?:\.\d+)*)"
+        r"(?:[-_.]?(a|alpha|b|beta|c|rc|pre|preview)[-_.]?(\d*))?"
+        r"(?:-(\d+)|[-_.]?(?:post|rev|r)[-_.]?(\d*))?"
+        r"(?:[-_.]?dev[-_.]?(\d*))?"
+        r"(?:\+[a-z0-9._-]*)?$",
+        re.IGNORECASE
+    )
+    """re.Pattern: Splits a PEP 440 version into its release numbers, pre-release, post-release and dev-release."""
+
+    PRE_RELEASE_PHASES: dict[str, int] = {
+        "a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "rc": 2, "pre": 2, "preview": 2,
+    }
+    """dict[str, int]: The order of each spelling of a pre-release phase."""
+
+    SPECIFIER_PATTERN: re.Pattern = re.compile(r"^\s*(===|~=|==|!=|<=|>=|<|>)\s*(\S+)\s*$")
+    """re.Pattern: Splits a version specifier clause into its operator and version."""
+
+    WHEEL_FILE_NAME_PATTERN: re.Pattern = re.compile(r"^([^-]+)-([^-]+)(?:-[^-]+)?-[^-]+-[^-]+-[^-]+\.whl$")
+    """re.Pattern: Splits the file name of a wheel into the package's name and version."""
+
+    def __init__(self, directory: str, use_virtualenv: bool = False, offline: bool = False) -> None:
         """Initializes the Virtual Environment Manager.
         
         Args:
             directory (str): The base directory for FNA installation and related files.
+            use_virtualenv (bool, optional): Whether to create the virtual environment with virtualenv instead of the
+                standard library's venv module. Also enabled by setting PROJECTTOOLS_USE_VIRTUALENV to 1. Defaults to
+                False.
+            offline (bool, optional): Whether to install packages from the per-user wheelhouse only, failing if one
+                isn't there instead of downloading it. Also enabled by setting PROJECTTOOLS_OFFLINE to 1. Defaults to
+                False.
         """
         self._base_directory = directory
         self._virtual_environment_path = os.path.join(directory, ".venv")
+        self._fingerprint_path = os.path.join(self._virtual_environment_path, self.FINGERPRINT_FILE_NAME)
+        self._fingerprint: dict | None = None
+        self._creator = (
+            self.VIRTUALENV_CREATOR
+            if use_virtualenv or os.environ.get(self.USE_VIRTUALENV_ENVIRONMENT_VARIABLE) == "1"
+            else self.VENV_CREATOR
+        )
+        self._offline = offline or os.environ.get(self.OFFLINE_ENVIRONMENT_VARIABLE) == "1"
+        self._pip_wheel_directory = os.path.join(self._get_user_cache_directory(), "pip")
+        self._wheelhouse_directory = os.path.join(self._get_user_cache_directory(), "wheelhouse")
         
     def setup_environment(self) -> None:
         """Sets up the Python Virtual Environment"""
-        self.install_package("virtualenv")
+        if self._creator == self.VIRTUALENV_CREATOR:
+            self.require([self.VIRTUALENV_REQUIREMENT])
         self._setup_environment()
         
 
@@ -42,43 +133,223 @@ class VirtualEnvironmentManager:
         """
         return hasattr(sys, "real_prefix") or (hasattr(sys, "base_prefix") and sys.base_prefix != sys.prefix)
 
+    @classmethod
+    def _get_user_cache_directory(cls) -> str:
+        """Gets the per-user cache directory shared by every project.
+        
+        Returns:
+            str: The path to the per-user cache directory.
+        """
+        if os.environ.get(cls.USER_CACHE_DIRECTORY_ENVIRONMENT_VARIABLE):
+            return os.environ[cls.USER_CACHE_DIRECTORY_ENVIRONMENT_VARIABLE]
+        if sys.platform == "win32":
+            base_directory = os.environ.get("LOCALAPPDATA", os.path.expanduser(os.path.join("~", "AppData", "Local")))
+        elif sys.platform == "darwin":
+            base_directory = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+        else:
+            base_directory = os.environ.get("XDG_CACHE_HOME", os.path.expanduser(os.path.join("~", ".cache")))
+        return os.path.join(base_directory, "ProjectTools")
+
+    @staticmethod
+    def _get_interpreter_fingerprint() -> dict:
+        """Gets what identifies the interpreter a virtual environment is built from.
+        
+        Returns:
+            dict: The interpreter's path, version and architecture.
+        """
+        return {
+            "executable": os.path.realpath(sys.executable),
+            "version": sys.version,
+            "machine": platform.machine(),
+        }
+
+    def _read_fingerprint(self) -> dict | None:
+        """Reads the fingerprint of the existing virtual environment.
+        
+        Returns:
+            dict | None: The fingerprint, or None if there is no virtual environment or it has no readable fingerprint.
+        """
+        try:
+            with open(self._fingerprint_path, "r") as file:
+                fingerprint = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return fingerprint if isinstance(fingerprint, dict) else None
+
+    def _write_fingerprint(self) -> None:
+        """Writes the fingerprint of the virtual environment, replacing the old one in one step."""
+        with open(f"{self._fingerprint_path}.tmp", "w") as file:
+            json.dump(self._fingerprint, file, indent=2)
+        os.replace(f"{self._fingerprint_path}.tmp", self._fingerprint_path)
+
     def _setup_environment(self) -> None:
         """Sets up a Python virtual environment if one is not already active.
         
-        Checks if already running within a virtual environment. If not, creates and activates a new virtual environment
-        at a predefined path.
+        Checks if already running within a virtual environment. If not, reuses the virtual environment at a predefined
+        path if it was built from the same interpreter, or (re)creates it otherwise, and activates it.
         """
         print("Setting up environment...")
         if self._is_virtual_environment():
             print("  Already in virtual environment!")
             return
 
-        # setup virtual environment
+        # reuse the virtual environment if it was built the same way from this interpreter and is still intact
+        interpreter = self._get_interpreter_fingerprint()
+        fingerprint = self._read_fingerprint()
+        reuse_virtual_environment = (
+            fingerprint is not None and fingerprint.get("interpreter") == interpreter
+            and fingerprint.get("creator") == self._creator and os.path.isfile(self._get_python_executable())
+        )
         setupVirtualEnvironment = not self._manage_directory(
             directory=self._virtual_environment_path,
-            delete_directory_if_exists=True,
+            delete_directory_if_exists=not reuse_virtual_environment,
             create_directory_if_not_exists=False,
         )
 
-        print("  Setting up virtual environment...")
         if setupVirtualEnvironment:
-            subprocess.call([sys.executable, "-m", "virtualenv", self._virtual_environment_path])
+            print("  Setting up virtual environment...")
+            if self._creator == self.VIRTUALENV_CREATOR:
+                result = subprocess.call([sys.executable, "-m", "virtualenv", self._virtual_environment_path])
+            else:
+                result = subprocess.call(
+                    [sys.executable, "-m", "venv", "--without-pip", self._virtual_environment_path]
+                )
+            if result != 0:
+                raise Exception(f"Failed to create the virtual environment at {self._virtual_environment_path}; set "
+                                f"{self.USE_VIRTUALENV_ENVIRONMENT_VARIABLE}=1 to create it with virtualenv instead")
+            self._fingerprint = {"interpreter": interpreter, "creator": self._creator, "packages": {}}
+            self._write_fingerprint()
+        else:
+            print("  Reusing virtual environment...")
+            self._fingerprint = fingerprint
+            self._fingerprint.setdefault("packages", {})
 
         print("  Activating virtual environment...")
+        self._activate()
+
+    def _get_scripts_directory(self) -> str:
+        """Gets the directory of the virtual environment's executables.
+        
+        Returns:
+            str: The path of the scripts directory.
+        """
         if platform.system() == "Windows":
-            activation_file = os.path.join(self._virtual_environment_path, "Scripts", "activate_this.py")
-        else:
-            activation_file = os.path.join(self._virtual_environment_path, "bin", "activate_this.py")
-        exec(open(activation_file).read(), {'__file__': activation_file})
+            return os.path.join(self._virtual_environment_path, "Scripts")
+        return os.path.join(self._virtual_environment_path, "bin")
+
+    def _get_python_executable(self) -> str:
+        """Gets the virtual environment's Python interpreter.
+        
+        Returns:
+            str: The path of the virtual environment's Python interpreter.
+        """
+        if platform.system() == "Windows":
+            return os.path.join(self._get_scripts_directory(), "python.exe")
+        return os.path.join(self._get_scripts_directory(), "python")
+
+    def _get_site_packages_directory(self) -> str:
+        """Gets the directory packages are installed into in the virtual environment.
+        
+        Returns:
+            str: The path of the site-packages directory.
+        """
+        if platform.system() == "Windows":
+            return os.path.join(self._virtual_environment_path, "Lib", "site-packages")
+        return os.path.join(
+            self._virtual_environment_path, "lib", f"python{sys.version_info.major}.{sys.version_info.minor}",
+            "site-packages"
+        )
+
+    def _activate(self) -> None:
+        """Activates the virtual environment in the running interpreter.
+        
+        Does what virtualenv's activate_this.py does, which environments made by the venv module don't have: puts the
+        virtual environment's executables first on the PATH and its site-packages first on sys.path.
+        """
+        os.environ["PATH"] = os.pathsep.join([self._get_scripts_directory(), os.environ.get("PATH", "")])
+        os.environ["VIRTUAL_ENV"] = self._virtual_environment_path
+
+        previous_length = len(sys.path)
+        site.addsitedir(self._get_site_packages_directory())
+        sys.path[:] = sys.path[previous_length:] + sys.path[:previous_length]
+
+        sys.prefix = sys.exec_prefix = self._virtual_environment_path
+
+    def _get_pip_command(self) -> list[str]:
+        """Gets the command that runs pip for the virtual environment's interpreter.
+        
+        Virtual environments made by the venv module don't have pip installed in them. Instead, pip is run straight
+        from its wheel, which is cached per user so that it is only ever looked up once.
+        
+        Returns:
+            list[str]: The command that runs pip.
+        """
+        if self._fingerprint["creator"] == self.VIRTUALENV_CREATOR:
+            return [self._get_python_executable(), "-m", "pip"]
+
+        pip_wheel = self._fingerprint.get("pip_wheel", "")
+        if not os.path.isfile(pip_wheel):
+            pip_wheel = self._get_pip_wheel()
+            self._fingerprint["pip_wheel"] = pip_wheel
+            self._write_fingerprint()
+        return [self._get_python_executable(), os.path.join(pip_wheel, "pip")]
+
+    def _get_pip_wheel(self) -> str:
+        """Gets pip's wheel from the per-user cache, filling the cache if needed.
+        
+        The cache is filled from the wheel bundled with the standard library's ensurepip module, or failing that by
+        having the host interpreter's pip download it.
+        
+        Returns:
+            str: The path of the cached pip wheel.
+        """
+        # Step 1: Use the cached wheel
+        cached_wheels = sorted(glob.glob(os.path.join(self._pip_wheel_directory, "pip-*.whl")))
+        if cached_wheels:
+            return cached_wheels[-1]
+
+        # Step 2: Cache the wheel bundled with ensurepip
+        self._manage_directory(
+            directory=self._pip_wheel_directory, delete_directory_if_exists=False, create_directory_if_not_exists=True
+        )
+        ensurepip_spec = util.find_spec("ensurepip")
+        bundled_wheels = sorted(glob.glob(
+            os.path.join(os.path.dirname(ensurepip_spec.origin), "_bundled", "pip-*.whl")
+        )) if ensurepip_spec is not None and ensurepip_spec.origin else []
+        if bundled_wheels:
+            print("  Caching pip...")
+            cached_wheel = os.path.join(self._pip_wheel_directory, os.path.basename(bundled_wheels[-1]))
+            shutil.copyfile(bundled_wheels[-1], f"{cached_wheel}.tmp")
+            os.replace(f"{cached_wheel}.tmp", cached_wheel)
+            return cached_wheel
+
+        # Step 3: Download the wheel with the host's pip
+        if self._offline:
+            raise Exception(f"Failed to find a pip wheel to bootstrap the virtual environment with, and pip can't be "
+                            f"downloaded offline; put one in {self._pip_wheel_directory}")
+        print("  Downloading pip...")
+        subprocess.call([
+            sys.executable, "-m", "pip", "download", "--no-deps", "--only-binary", ":all:", "--dest",
+            self._pip_wheel_directory, "pip"
+        ])
+        cached_wheels = sorted(glob.glob(os.path.join(self._pip_wheel_directory, "pip-*.whl")))
+        if not cached_wheels:
+            raise Exception(f"Failed to find a pip wheel to bootstrap the virtual environment with; set "
+                            f"{self.USE_VIRTUALENV_ENVIRONMENT_VARIABLE}=1 to create it with virtualenv instead")
+        return cached_wheels[-1]
 
     def _manage_directory(
             self, *, directory: str, delete_directory_if_exists: bool, create_directory_if_not_exists: bool
-    ) -> None:
+    ) -> bool:
         """Manages a directory, ensuring it exists and is a directory, not a file.
         
         Args:
             directory (str): The path to the directory to manage.
+            delete_directory_if_exists (bool): Whether to delete the directory if it exists.
             create_directory_if_not_exists (bool): Whether to create the directory if it doesn't exist.
+            
+        Returns:
+            bool: True if the directory exists afterwards, False otherwise.
         """
         if os.path.exists(directory):
             if os.path.isfile(directory):
@@ -89,6 +360,7 @@ class VirtualEnvironmentManager:
 
         if create_directory_if_not_exists and not os.path.exists(directory):
             os.makedirs(directory)
+        return os.path.isdir(directory)
 
     @staticmethod
     def _remove_file_system_entry(path: str) -> None:
@@ -107,17 +379,296 @@ class VirtualEnvironmentManager:
         else:
             shutil.rmtree(path)
 
-    @staticmethod
-    def install_package(package: str, version: str = "") -> None:
+    def install_package(self, package: str, version: str = "") -> None:
         """Installs a Python package if it is not already installed.
 
-        Uses pip to install the specified package. If the package is already installed, no action is taken.
+        Uses pip to install the specified package. If the package is already installed, or the virtual environment's
+        fingerprint records it as installed at the same version, no action is taken.
         
         Args:
             package (str): The name of the package to install.
             version (str, optional): The version of the package to install. Defaults to "".
         """
-        if util.find_spec(package) is None:
-            if version != "":
-                package = f"{package}=={version}"
-            subprocess.call([sys.executable, "-m", "pip", "install", package])
+        self.require([f"{package}=={version}" if version != "" else package])
+
+    def require(self, requirements: list[str]) -> None:
+        """Installs every Python package in a list that is not already installed, with a single run of pip.
+
+        Whether each package is installed is checked in-process first, so pip only runs, once, for the missing ones.
+        If the wheelhouse has a wheel of every missing package they are installed from it without looking at PyPI,
+        otherwise (unless offline) from PyPI and the wheelhouse together.  That single run doesn't add the packages to
+        the wheelhouse, as downloading them into it first would take a second run of pip's resolver; `prefetch` fills
+        it instead.
+        
+        Args:
+            requirements (list[str]): The packages to install, each either a name ("GitPython") or a name and a version
+                specifier ("Pillow==11.1.0", "requests>=2.31,<3").
+        """
+        # Step 1: Find the packages that are missing
+        missing_requirements = {}
+        missing = []
+        for requirement in requirements:
+            package, specifier = self._parse_requirement(requirement)
+            if self._fingerprint is not None and self._fingerprint["packages"].get(package) == specifier:
+                continue
+            if not self.is_package_installed(requirement):
+                missing_requirements[package] = specifier
+                missing.append(requirement.strip())
+        if not missing_requirements:
+            return
+
+        # Step 2: Check whether the wheelhouse has them all
+        pip_command = self._get_pip_command() if self._fingerprint is not None else [sys.executable, "-m", "pip"]
+        prefetch_hint = f"run `python {os.path.basename(__file__)} prefetch` with network access to fill the wheelhouse"
+        not_in_wheelhouse = [requirement for requirement in missing if not self._is_in_wheelhouse(requirement)]
+        if not_in_wheelhouse and self._offline:
+            raise Exception(f"{', '.join(not_in_wheelhouse)} can't be installed offline; {prefetch_hint}")
+
+        # Step 3: Install them all at once
+        if not self._install_packages(pip_command, missing, use_index=bool(not_in_wheelhouse)):
+            if not_in_wheelhouse:
+                raise Exception(f"Failed to install {', '.join(missing)}")
+            raise Exception(f"Failed to install {', '.join(missing)} from the wheelhouse; {prefetch_hint}")
+        invalidate_caches()
+
+        # Step 4: Remember them so reusing the virtual environment doesn't need to check them again
+        if self._fingerprint is not None:
+            self._fingerprint["packages"].update(missing_requirements)
+            self._write_fingerprint()
+
+    def prefetch(self, requirements: list[str] | None = None) -> None:
+        """Downloads packages and their dependencies into the per-user wheelhouse, so they can be installed offline.
+        
+        Args:
+            requirements (list[str] | None, optional): The packages to download. Defaults to None
+                (DECLARED_REQUIREMENTS).
+        """
+        requirements = requirements or self.DECLARED_REQUIREMENTS
+        print(f"Downloading {', '.join(requirements)} into {self._wheelhouse_directory}...")
+        pip_command = [sys.executable, os.path.join(self._get_pip_wheel(), "pip")]
+        if not self._download_to_wheelhouse(pip_command, requirements):
+            raise Exception(f"Failed to download {', '.join(requirements)} into the wheelhouse")
+
+    def _is_in_wheelhouse(self, requirement: str) -> bool:
+        """Checks if the per-user wheelhouse has a wheel of a package at a version that satisfies a requirement.
+
+        Only the file names of the wheels are looked at; the package's dependencies are left to pip.
+        
+        Args:
+            requirement (str): The requirement, either a name ("GitPython") or a name and a version specifier
+                ("Pillow==11.1.0", "requests>=2.31,<3").
+        
+        Returns:
+            bool: True if a wheel of the package at a satisfying version is in the wheelhouse, False otherwise.
+        """
+        if not os.path.isdir(self._wheelhouse_directory):
+            return False
+        package, specifier = self._parse_requirement(requirement)
+        normalized_package = re.sub(r"[-_.]+", "_", package).lower()
+        for file_name in os.listdir(self._wheelhouse_directory):
+            match = self.WHEEL_FILE_NAME_PATTERN.match(file_name)
+            if match is None or re.sub(r"[-_.]+", "_", match.group(1)).lower() != normalized_package:
+                continue
+            if self._is_version_satisfied(match.group(2), specifier):
+                return True
+        return False
+
+    def _install_packages(self, pip_command: list[str], requirements: list[str], use_index: bool) -> bool:
+        """Installs packages with a single run of pip, preferring the wheels in the per-user wheelhouse.
+        
+        Args:
+            pip_command (list[str]): The command that runs pip.
+            requirements (list[str]): The packages to install.
+            use_index (bool): Whether packages (and dependencies) not in the wheelhouse are installed from PyPI.
+        
+        Returns:
+            bool: True if every package and its dependencies were installed, False otherwise.
+        """
+        find_links = ["--find-links", self._wheelhouse_directory] if os.path.isdir(self._wheelhouse_directory) else []
+        if not use_index and not find_links:
+            return False
+        return subprocess.call([
+            *pip_command, "install", *([] if use_index else ["--no-index"]), *find_links, *requirements
+        ]) == 0
+
+    def _download_to_wheelhouse(self, pip_command: list[str], requirements: list[str]) -> bool:
+        """Downloads wheels of packages and their dependencies from PyPI into the per-user wheelhouse.
+        
+        Args:
+            pip_command (list[str]): The command that runs pip.
+            requirements (list[str]): The packages to download.
+        
+        Returns:
+            bool: True if every package was downloaded, False otherwise.
+        """
+        self._manage_directory(
+            directory=self._wheelhouse_directory, delete_directory_if_exists=False, create_directory_if_not_exists=True
+        )
+        return subprocess.call([
+            *pip_command, "download", "--only-binary", ":all:", "--find-links", self._wheelhouse_directory, "--dest",
+            self._wheelhouse_directory, *requirements
+        ]) == 0
+
+    @classmethod
+    def is_package_installed(cls, requirement: str) -> bool:
+        """Checks if a package is installed at a version that satisfies a requirement.
+
+        Looks the package up in the installed distributions' metadata, so packages imported under another name
+        (GitPython as git, Pillow as PIL) are found too. A module with no distribution metadata, such as one bundled
+        with an embedded interpreter, only satisfies a requirement without a version specifier.
+        
+        Args:
+            requirement (str): The requirement, either a name ("GitPython") or a name and a version specifier
+                ("Pillow==11.1.0", "requests>=2.31,<3").
+        
+        Returns:
+            bool: True if the package is installed at a satisfying version, False otherwise.
+        """
+        package, specifier = cls._parse_requirement(requirement)
+        try:
+            installed_version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return specifier == "" and util.find_spec(cls.IMPORT_NAMES.get(package, package)) is not None
+        return cls._is_version_satisfied(installed_version, specifier)
+
+    @classmethod
+    def _parse_requirement(cls, requirement: str) -> tuple[str, str]:
+        """Splits a requirement into the package's name and version specifier.
+        
+        Args:
+            requirement (str): The requirement, either a name ("GitPython") or a name and a version specifier
+                ("Pillow==11.1.0"), optionally with extras after the name ("requests[socks]>=2").
+        
+        Returns:
+            tuple[str, str]: The name of the package and the version specifier, or an empty string for any version.
+        """
+        match = cls.REQUIREMENT_PATTERN.match(requirement)
+        if match is None:
+            raise Exception(f"Invalid requirement: {requirement}")
+        return match.group(1), match.group(2).replace(" ", "")
+
+    @classmethod
+    def _parse_version(cls, version: str) -> tuple:
+        """Parses a version into a key that orders versions as PEP 440 does, ignoring any local suffix.
+        
+        Pre-releases and dev-releases order below their release, e.g. "2.0.0.dev1" < "2.0.0rc1" < "2.0" < "2.0.post1".
+        
+        Args:
+            version (str): The version, e.g. "11.1.0".
+        
+        Returns:
+            tuple: The release numbers without trailing zeros, e.g. (11, 1), followed by the pre-release, post-release
+                and dev-release, or an empty tuple if the version can't be parsed.
+        """
+        match = cls.VERSION_PATTERN.match(version.strip())
+        if match is None:
+            return ()
+        release_text, pre_phase, pre_number, post_number, post_spelled_number, dev_number = match.groups()
+        release = [int(number) for number in release_text.split(".")]
+        while len(release) > 1 and release[-1] == 0:
+            release.pop()
+
+        is_post_release = post_number is not None or post_spelled_number is not None
+        if pre_phase is not None:
+            pre_release = (cls.PRE_RELEASE_PHASES[pre_phase.lower()], int(pre_number or 0))
+        elif dev_number is not None and not is_post_release:
+            # a dev-release of the release itself orders below all of its pre-releases
+            pre_release = (-1, 0)
+        else:
+            pre_release = (len(cls.PRE_RELEASE_PHASES), 0)
+        post_release = int(post_number or post_spelled_number or 0) if is_post_release else -1
+        dev_release = (0, int(dev_number or 0)) if dev_number is not None else (1, 0)
+        return tuple(release), pre_release, post_release, dev_release
+
+    @classmethod
+    def _is_pre_release(cls, key: tuple) -> bool:
+        """Checks if a parsed version is a pre-release or dev-release.
+        
+        Args:
+            key (tuple): The version, as parsed by `_parse_version`.
+        
+        Returns:
+            bool: True if the version is a pre-release or dev-release, False otherwise.
+        """
+        return key[1][0] < len(cls.PRE_RELEASE_PHASES) or key[3][0] == 0
+
+    @staticmethod
+    def _has_release_prefix(release: tuple[int, ...], prefix: str) -> bool:
+        """Checks if release numbers start with a version prefix, e.g. (2, 1) starts with "2.1.0" and "2".
+        
+        Args:
+            release (tuple[int, ...]): The release numbers of a version, the first item `_parse_version` returns.
+            prefix (str): The version prefix.
+        
+        Returns:
+            bool: True if the release numbers start with the prefix, False otherwise.
+        """
+        prefix_release = tuple(int(number) for number in prefix.split(".") if number.isdigit())
+        padded_release = release + (0,) * max(0, len(prefix_release) - len(release))
+        return padded_release[:len(prefix_release)] == prefix_release
+
+    @classmethod
+    def _is_version_satisfied(cls, version: str, specifier: str) -> bool:
+        """Checks if a version satisfies a version specifier.
+
+        Supports the comparison operators of PEP 440, with pre-releases and dev-releases ordered below their release,
+        and a pre-release of a version never satisfying "<" that version. A version or specifier that can't be parsed
+        is never satisfied, leaving pip to decide.
+        
+        Args:
+            version (str): The installed version.
+            specifier (str): The version specifier, a comma-separated list of clauses such as ">=2.31,<3", or an
+                empty string for any version.
+        
+        Returns:
+            bool: True if the version satisfies every clause of the specifier, False otherwise.
+        """
+        key = cls._parse_version(version)
+        for clause in filter(None, specifier.split(",")):
+            match = cls.SPECIFIER_PATTERN.match(clause)
+            if match is None:
+                return False
+            operator, required_version = match.groups()
+            if operator == "===":
+                satisfied = version == required_version
+            elif not key:
+                return False
+            elif required_version.endswith(".*") and operator in ("==", "!="):
+                satisfied = cls._has_release_prefix(key[0], required_version[:-2]) == (operator == "==")
+            else:
+                required_key = cls._parse_version(required_version)
+                if not required_key:
+                    return False
+                if operator == "~=":
+                    prefix = required_version.rsplit(".", 1)[0]
+                    satisfied = key >= required_key and cls._has_release_prefix(key[0], prefix)
+                elif operator == "<":
+                    satisfied = key < required_key and not (
+                        cls._is_pre_release(key) and not cls._is_pre_release(required_key) and key[0] == required_key[0]
+                    )
+                else:
+                    satisfied = {
+                        "==": key == required_key, "!=": key != required_key,
+                        "<=": key <= required_key, ">=": key >= required_key, ">": key > required_key,
+                    }[operator]
+            if not satisfied:
+                return False
+        return True
+
+
+if __name__ == "__main__":
+    # Get arguments
+    parser = argparse.ArgumentParser(description="Manages the build scripts' Python packages.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prefetch_parser = subparsers.add_parser(
+        "prefetch", help="download the build scripts' packages into the per-user wheelhouse for offline installs"
+    )
+    prefetch_parser.add_argument(
+        "requirements", nargs="*", help="the packages to download (default: every package the build scripts use)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "prefetch":
+        VirtualEnvironmentManager(directory=os.getcwd()).prefetch(args.requirements)
+    print("Done!")
+    sys.exit(0)